@@ -0,0 +1,36 @@
+"""
+atomic_file.py
+
+Write-temp-then-rename for every file the scripts publish.
+
+The new content goes to a temporary file in the same directory, is flushed
+to disk, and is then renamed over the target with os.replace(), which is
+atomic on both POSIX and Windows. A reader (or the web server) sees either
+the old file or the new one, never a half-written one, and a crash or
+error mid-write leaves the old file untouched.
+"""
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """Open a temporary file next to `path` for writing and rename it over `path` once the block succeeds"""
+    # The pid keeps two processes writing the same file from sharing a temporary file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def write_bytes(path, payload):
+    """Atomically replace the file at `path` with `payload`"""
+    with atomic_write(path, 'wb') as f:
+        f.write(payload)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+"""
+benchmark.py
+
+Time the PDF converters over the schedule PDFs bundled with the repo.
+
+Every (converter, PDF) pair runs in a fresh process with the page cache
+turned off, so each measurement is a cold conversion. For each pair the
+benchmark reports wall time, rows/sec, peak memory (max RSS of that
+process) and where the time went:
+
+    open              pdfplumber.open()
+    page parsing      pdfminer layout analysis of each page
+    table extraction  finding tables and reading their cells
+    text rows         reading rows from the text layer (--text-rows)
+    text extraction   page.extract_text() (used for Line Number)
+    bounding boxes    row_bounding_box() (final converter only)
+    row matching      mapping page models onto rows, matching text lines
+    normalization     clean_text(), date/time standardization, row checks
+    serialization     writing the output JSON
+    other             everything else (cache keys, metadata, printing)
+
+Stage times are exclusive: a stage nested inside another is only counted
+once. Page parsing is lazy in pdfplumber, so it shows up on its own no
+matter which stage first touches a page.
+
+With --startup, the benchmark instead times cold starts of the
+exam_routine.py commands: each one runs repeatedly as a fresh
+`python exam_routine.py ...` process against a copy of exam_data.json with
+its index and shards, next to a bare `python -c pass` for reference. Every
+command but convert should finish within STARTUP_TARGET; the exit status
+is 1 if the median of one does not.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --repeat 5 --output benchmark_results.json
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.2
+    python benchmark.py --text-rows
+    python benchmark.py --startup
+
+With --baseline, a case whose wall time or peak memory grew by more than
+the threshold counts as a regression and the exit status is 1.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from atomic_file import atomic_write
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CONVERTERS = {
+    "final": "pdf_converter",
+    "mid": "convert_schedule",
+}
+
+DEFAULT_PDFS = ("examData.pdf", "examDataMid.pdf.bak", "examData2.pdf.bak", "examData.pdf.bak")
+
+STAGES = ("open", "page parsing", "table extraction", "text rows", "text extraction", "bounding boxes",
+          "row matching", "normalization", "serialization", "other")
+
+# Allowed slowdown (or memory growth) against a baseline before it counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+# exam_routine.py arguments timed by --startup; {data} is the copied exam_data.json, None the bare interpreter
+STARTUP_COMMANDS = {
+    "python": None,
+    "query": ["query", "CSE220:3", "MAT120", "--file", "{data}"],
+    "set-title": ["set-title", "Final Exam", "Fall-2025", "--file", "{data}"],
+    "diff": ["diff", "{data}", "{data}", "--output", "{dir}/changes.json", "--quiet"],
+    "convert --help": ["convert", "--help"],
+}
+# Cold start budget, in seconds, for every command but convert
+STARTUP_TARGET = 0.1
+STARTUP_REPEAT = 20
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StageTimer:
+    """Accumulate exclusive wall time per stage for wrapped functions"""
+
+    def __init__(self):
+        self.totals = {}
+        self._children = []
+
+    def wrap(self, stage, func):
+        """Return `func` timed under `stage`"""
+        def timed(*args, **kwargs):
+            self._children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._children.pop()
+                self.totals[stage] = self.totals.get(stage, 0.0) + elapsed - children
+                if self._children:
+                    self._children[-1] += elapsed
+        return timed
+
+    def report(self, wall_time):
+        """Seconds per stage, with the untimed remainder under "other\""""
+        stages = {stage: round(self.totals.get(stage, 0.0), 4) for stage in STAGES if stage != "other"}
+        stages["other"] = round(max(0.0, wall_time - sum(self.totals.values())), 4)
+        return stages
+
+
+@contextlib.contextmanager
+def timed_stages(timer):
+    """Patch the extraction engine and pdfplumber so their work is timed per stage"""
+    import json as json_module
+    import ndjson_stream
+    import pdfplumber
+    import schedule_engine
+    import table_template
+    import text_rows
+    from pdfplumber.page import Page
+    from pdfplumber.table import Table
+
+    patches = [
+        (pdfplumber, "open", "open"),
+        (Page, "layout", "page parsing"),
+        (Page, "objects", "page parsing"),
+        (Page, "find_tables", "table extraction"),
+        (table_template, "find_tables", "table extraction"),
+        (Table, "extract", "table extraction"),
+        (text_rows, "parse_page", "text rows"),
+        (Page, "extract_text", "text extraction"),
+        (schedule_engine, "row_bounding_box", "bounding boxes"),
+        (schedule_engine, "map_page", "row matching"),
+        (schedule_engine, "clean_text", "normalization"),
+        (schedule_engine, "standardize_date", "normalization"),
+        (schedule_engine, "standardize_time", "normalization"),
+        (schedule_engine, "is_valid_entry", "normalization"),
+        (schedule_engine, "is_header_row", "normalization"),
+        (json_module, "dump", "serialization"),
+        (ndjson_stream, "write_json", "serialization"),
+    ]
+
+    originals = []
+    for owner, name, stage in patches:
+        if not hasattr(owner, name):
+            continue
+        # Look in the class dict so properties are wrapped, not their current value
+        original = vars(owner).get(name, getattr(owner, name))
+        originals.append((owner, name, original))
+        if isinstance(original, property):
+            setattr(owner, name, property(timer.wrap(stage, original.fget)))
+        else:
+            setattr(owner, name, timer.wrap(stage, original))
+    try:
+        yield timer
+    finally:
+        for owner, name, original in reversed(originals):
+            setattr(owner, name, original)
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(converter, pdf_path, repeat=3, use_template=False, use_text=False):
+    """Convert `pdf_path` `repeat` times with one converter; meant to run in its own process"""
+    module = importlib.import_module(CONVERTERS[converter])
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'exam_data.json')
+        for _ in range(repeat):
+            timer = StageTimer()
+            with timed_stages(timer), contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                module.convert_pdf_to_json(pdf_path, json_path, use_cache=False, use_template=use_template,
+                                           use_text=use_text)
+                wall_time = time.perf_counter() - start
+            runs.append({"wall_time": wall_time, "stages": timer.report(wall_time)})
+
+        with open(json_path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)["metadata"]["total_entries"]
+
+    fastest = min(runs, key=lambda run: run["wall_time"])
+    return {
+        "converter": converter,
+        "pdf": os.path.basename(pdf_path),
+        "rows": rows,
+        "wall_time": round(fastest["wall_time"], 4),
+        "wall_times": [round(run["wall_time"], 4) for run in runs],
+        "rows_per_sec": round(rows / fastest["wall_time"], 1) if fastest["wall_time"] else None,
+        "peak_memory_mb": peak_memory_mb(),
+        "stages": fastest["stages"]
+    }
+
+
+def run_benchmarks(converters, pdf_paths, repeat=3, use_template=False, use_text=False):
+    """Run every converter over every PDF, each pair in a fresh process"""
+    # A spawned process starts clean, so its peak memory belongs to this case alone
+    context = get_context('spawn')
+    cases = {}
+    for pdf_path in pdf_paths:
+        for converter in converters:
+            key = f"{converter}:{os.path.basename(pdf_path)}"
+            print(f"Benchmarking {key} ({repeat} runs)...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                cases[key] = executor.submit(run_case, converter, pdf_path, repeat, use_template, use_text).result()
+
+    import pdfplumber
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pdfplumber": pdfplumber.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "template": use_template,
+        "text_rows": use_text,
+        "cases": cases
+    }
+
+
+def run_startup(repeat=STARTUP_REPEAT, json_path=None):
+    """Time each startup command `repeat` times in fresh processes against a copy of the data files"""
+    import schedule_index
+    import schedule_shards
+
+    cases = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'exam_data.json')
+        shutil.copyfile(json_path or os.path.join(REPO_DIR, 'exam_data.json'), data_path)
+        schedule_index.write_index(data_path)
+        schedule_shards.write_shards(data_path)
+
+        for name, args in STARTUP_COMMANDS.items():
+            if args is None:
+                command = [sys.executable, '-c', 'pass']
+            else:
+                command = [sys.executable, os.path.join(REPO_DIR, 'exam_routine.py')]
+                command += [arg.format(data=data_path, dir=tmp) for arg in args]
+            print(f"Timing {name} ({repeat} runs)...")
+
+            wall_times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(command, cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                wall_times.append(time.perf_counter() - start)
+
+            # Laid out like a converter case (fastest run as wall_time) so --baseline compares them the same way
+            cases[f"startup:{name}"] = {
+                "command": name,
+                "wall_time": round(min(wall_times), 4),
+                "wall_times": [round(wall_time, 4) for wall_time in wall_times],
+                "median": round(statistics.median(wall_times), 4),
+                "peak_memory_mb": None,
+                "target": STARTUP_TARGET if args is not None and args[0] != "convert" else None
+            }
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "cases": cases
+    }
+
+
+def print_startup(results):
+    """Print the fastest and median run of each startup command against its target"""
+    print(f"\n{'Command':<20}{'Fastest ms':>12}{'Median ms':>12}{'Target ms':>12}")
+    for case in results["cases"].values():
+        target = f"{case['target'] * 1000:.0f}" if case["target"] else "-"
+        print(f"{case['command']:<20}{case['wall_time'] * 1000:>12.1f}{case['median'] * 1000:>12.1f}{target:>12}")
+
+
+def over_target(results):
+    """One message per startup command whose median run exceeds its target"""
+    return [f"{case['command']}: median {case['median'] * 1000:.1f} ms > {case['target'] * 1000:.0f} ms"
+            for case in results["cases"].values() if case["target"] and case["median"] > case["target"]]
+
+
+def print_results(results):
+    """Print one summary line per case, then the stage breakdown with cases as numbered columns"""
+    print(f"\n{'#':<4}{'Case':<32}{'Rows':>7}{'Wall s':>9}{'Rows/s':>9}{'Peak MB':>9}")
+    for number, (key, case) in enumerate(results["cases"].items(), 1):
+        peak = f"{case['peak_memory_mb']:.1f}" if case["peak_memory_mb"] is not None else "n/a"
+        print(f"{number:<4}{key:<32}{case['rows']:>7}{case['wall_time']:>9.2f}{case['rows_per_sec'] or 0:>9.0f}{peak:>9}")
+
+    print(f"\n{'Stage seconds':<20}" + "".join(f"{'#' + str(number):>8}" for number in range(1, len(results["cases"]) + 1)))
+    for stage in STAGES:
+        print(f"{stage:<20}" + "".join(f"{case['stages'].get(stage, 0.0):>8.2f}" for case in results["cases"].values()))
+
+
+def check_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare against a baseline run; returns one message per regression"""
+    regressions = []
+    for key, case in results["cases"].items():
+        before = baseline.get("cases", {}).get(key)
+        if before is None:
+            continue
+        for metric in ("wall_time", "peak_memory_mb"):
+            if case.get(metric) is None or not before.get(metric):
+                continue
+            change = case[metric] / before[metric] - 1
+            if change > threshold:
+                regressions.append(f"{key}: {metric} {before[metric]} -> {case[metric]} (+{change:.0%})")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the PDF converters over the bundled schedule PDFs')
+    parser.add_argument('pdfs', nargs='*', help=f'PDFs to convert (default: {", ".join(DEFAULT_PDFS)})')
+    parser.add_argument('--converter', '-c', choices=['final', 'mid', 'both'], default='both',
+                        help='Which converter to run (default: both)')
+    parser.add_argument('--repeat', '-r', type=int,
+                        help=f'Runs per case; the fastest is reported (default: 3, {STARTUP_REPEAT} with --startup)')
+    parser.add_argument('--template', action='store_true', help='Convert with the table template (--template)')
+    parser.add_argument('--text-rows', action='store_true', help='Read rows from the text layer (--text-rows)')
+    parser.add_argument('--startup', action='store_true',
+                        help='Time cold starts of the exam_routine.py commands instead of the converters')
+    parser.add_argument('--data', help='Data file to copy for --startup (default: the bundled exam_data.json)')
+    parser.add_argument('--output', '-o',
+                        help='Where to save the results as JSON (default: benchmark_results.json, '
+                             'startup_results.json with --startup)')
+    parser.add_argument('--baseline', '-b', help='Earlier results file to check for regressions against')
+    parser.add_argument('--threshold', '-t', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed growth in wall time or peak memory, as a fraction (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    if args.startup:
+        results = run_startup(max(1, args.repeat or STARTUP_REPEAT), args.data)
+        print_startup(results)
+        failures = over_target(results)
+    else:
+        pdf_paths = args.pdfs or [os.path.join(REPO_DIR, name) for name in DEFAULT_PDFS]
+        missing = [path for path in pdf_paths if not os.path.exists(path)]
+        for path in missing:
+            print(f"Warning: skipping missing PDF {path}")
+        pdf_paths = [path for path in pdf_paths if path not in missing]
+
+        converters = list(CONVERTERS) if args.converter == 'both' else [args.converter]
+        results = run_benchmarks(converters, pdf_paths, max(1, args.repeat or 3), args.template, args.text_rows)
+        print_results(results)
+        failures = []
+
+    output = args.output or ('startup_results.json' if args.startup else 'benchmark_results.json')
+    with atomic_write(output) as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+    for message in failures:
+        print(f"Over target: {message}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = check_regressions(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"Regression: {message}")
+        failures += regressions
+        if not regressions:
+            print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+compact_json.py
+
+Write a compact, columnar copy of `exam_data.json` for the site to
+download (`exam_data.json` -> `exam_data.compact.json`), together with
+precompressed `.gz` and `.br` siblings for static hosts that serve them
+directly.
+
+Instead of one object per row, the compact file holds one array per field.
+Fields with few distinct values (courses, sections, dates, times, rooms,
+departments) are stored once in a dictionary and referenced by index, and
+bounding boxes are rounded to 0.01 pt. A field missing from some rows is
+listed with the positions of those rows under "absent", so decoding leaves
+it out of them. Decoding gives back the same rows and metadata, apart from
+the rounding. The file records the SHA-256 of the data file it was built
+from, so the index offsets stay valid for it.
+
+Usage:
+    python compact_json.py exam_data.json
+    python compact_json.py exam_data.json --report
+
+`.br` files need the optional `brotli` package (pip install brotli); without
+it only the `.gz` sibling is written.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+
+import run_stats
+from atomic_file import write_bytes
+from schedule_index import content_hash
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+COMPACT_FORMAT = "columnar"
+COMPACT_VERSION = 2
+
+# Low-cardinality fields, stored as a value list plus one index per row
+DICTIONARY_FIELDS = ("Course", "Section", "Final Date", "Mid Date", "Start Time", "End Time", "Room.", "Dept.")
+
+# Bounding boxes in PDF points; 0.01 pt is far below one rendered pixel
+COORD_DIGITS = 2
+
+BOX_KEYS = ("x0", "y0", "x1", "y1")
+
+
+def compact_path_for(json_path):
+    """Default compact file location for a data file"""
+    return os.path.splitext(json_path)[0] + '.compact.json'
+
+
+def encode_box(box):
+    """[x0, y0, x1, y1] rounded, with the exact flag appended when the row has one"""
+    if not box:
+        return None
+    encoded = [round(box[key], COORD_DIGITS) for key in BOX_KEYS]
+    if "exact" in box:
+        encoded.append(1 if box["exact"] else 0)
+    return encoded
+
+
+def decode_box(encoded):
+    """Turn an encode_box() list back into a BoundingBox dict"""
+    if encoded is None:
+        return None
+    box = dict(zip(BOX_KEYS, encoded))
+    if len(encoded) > len(BOX_KEYS):
+        box["exact"] = bool(encoded[len(BOX_KEYS)])
+    return box
+
+
+def encode(data, raw):
+    """Build the columnar form of parsed `data` whose file bytes are `raw`"""
+    exams = data.get("exams") or []
+
+    fields = []
+    for exam in exams:
+        for field in exam:
+            if field not in fields:
+                fields.append(field)
+
+    columns = {}
+    absent = {}
+    for field in fields:
+        values = [exam.get(field) for exam in exams]
+        missing = [row for row, exam in enumerate(exams) if field not in exam]
+        if missing:
+            absent[field] = missing
+        if field == "BoundingBox":
+            columns[field] = [encode_box(value) for value in values]
+        elif field in DICTIONARY_FIELDS:
+            dictionary = {}
+            codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+            columns[field] = {"values": list(dictionary), "codes": codes}
+        else:
+            columns[field] = values
+
+    return {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "source_hash": content_hash(raw),
+        "metadata": data.get("metadata") or {},
+        "count": len(exams),
+        "fields": fields,
+        "columns": columns,
+        "absent": absent
+    }
+
+
+def decode(compact):
+    """Turn a columnar file back into {"metadata": ..., "exams": [...]}"""
+    columns = []
+    for field in compact["fields"]:
+        column = compact["columns"][field]
+        if field == "BoundingBox":
+            column = [decode_box(value) for value in column]
+        elif isinstance(column, dict):
+            column = [column["values"][code] for code in column["codes"]]
+        columns.append(column)
+
+    exams = [dict(zip(compact["fields"], row)) for row in zip(*columns)]
+    for field, rows in (compact.get("absent") or {}).items():
+        for row in rows:
+            del exams[row][field]
+    return {"metadata": compact["metadata"], "exams": exams}
+
+
+def dumps(compact):
+    """Serialize a columnar file the way it is written to disk"""
+    return json.dumps(compact, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_compressed(path, payload):
+    """Write the .gz (and, with brotli installed, .br) sibling of `path`; returns the paths written"""
+    written = [path + '.gz']
+    # mtime=0 keeps the .gz byte-identical across runs with the same data
+    write_bytes(path + '.gz', gzip.compress(payload, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        write_bytes(path + '.br', brotli.compress(payload, quality=11))
+        written.append(path + '.br')
+    return written
+
+
+def write_compact(json_path, compact_path=None):
+    """Write the compact file for the data file at `json_path` plus its compressed siblings"""
+    compact_path = compact_path or compact_path_for(json_path)
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+
+    payload = dumps(encode(json.loads(raw), raw))
+    write_bytes(compact_path, payload)
+    written = write_compressed(compact_path, payload)
+
+    log.info(f"Wrote compact data to {compact_path} ({len(payload):,} bytes, was {len(raw):,})")
+    if brotli is None:
+        log.info("brotli is not installed, skipped the .br file (pip install brotli)")
+    log.info(f"Wrote {', '.join(written)}")
+    return len(payload)
+
+
+def time_parse(payload, parse, repeat=5):
+    """Best wall time in milliseconds of parse(payload) over `repeat` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(payload)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def size_report(json_path):
+    """Print the size and parse time of the current format next to the compact one"""
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    compact = encode(data, raw)
+
+    formats = [
+        ("exam_data.json (indent=2)", raw, json.loads),
+        ("rows, minified", json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), json.loads),
+        ("columnar", dumps(compact), lambda payload: decode(json.loads(payload))),
+    ]
+
+    print(f"{'Format':<28}{'Raw':>12}{'gzip':>12}{'brotli':>12}{'Parse ms':>10}")
+    for name, payload, parse in formats:
+        gz = len(gzip.compress(payload, compresslevel=9, mtime=0))
+        br = f"{len(brotli.compress(payload, quality=11)):,}" if brotli is not None else "n/a"
+        print(f"{name:<28}{len(payload):>12,}{gz:>12,}{br:>12}{time_parse(payload, parse):>10.1f}")
+
+    # Everything but the rounded coordinates must survive the round trip
+    decoded = decode(compact)
+    for exam in data.get("exams") or []:
+        if "BoundingBox" in exam:
+            exam["BoundingBox"] = decode_box(encode_box(exam["BoundingBox"]))
+    status = "identical" if decoded == data else "DIFFERENT"
+    print(f"Round trip: {status} (bounding boxes rounded to {COORD_DIGITS} decimals)")
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Write a compact columnar copy of exam_data.json with .gz/.br siblings')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--output', '-o', help='Compact file to write (default: <data file>.compact.json)')
+    parser.add_argument('--report', action='store_true', help='Only print a size/parse-time comparison, write nothing')
+    args = parser.parse_args()
+
+    if args.report:
+        size_report(args.json_path)
+    else:
+        write_compact(args.json_path, args.output)
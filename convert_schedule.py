@@ -1,176 +1,57 @@
-import pdfplumber
-import json
+import argparse
+import logging
 import sys
-import re
-from datetime import datetime
-
-def clean_text(text):
-    """Clean text by removing extra whitespace"""
-    if text is None:
-        return None
-    return re.sub(r'\s+', ' ', text).strip()
-
-def standardize_date(date_str):
-    """Standardize date format to ISO (YYYY-MM-DD)"""
-    if not date_str or not isinstance(date_str, str):
-        return date_str
-
-    try:
-        # For format like "20-Mar-25"
-        dt = datetime.strptime(date_str.strip(), "%d-%b-%y")
-        return dt.strftime("%Y-%m-%d")
-    except ValueError:
-        return date_str
-
-def standardize_time(time_str):
-    """Standardize time format to 24-hour (HH:MM)"""
-    if not time_str or not isinstance(time_str, str):
-        return time_str
-
-    try:
-        # For format like "12:00 PM"
-        dt = datetime.strptime(time_str.strip(), "%I:%M %p")
-        return dt.strftime("%H:%M")
-    except ValueError:
-        return time_str
-
-def is_valid_entry(entry):
-    """Check if an entry has the minimum required fields to be considered valid"""
-    required_fields = ["Course", "Section", "Mid Date"]
-    return all(field in entry and entry[field] for field in required_fields)
-
-def convert_pdf_to_json(pdf_path, json_path):
-    print(f"Processing {pdf_path}...")
-
-    # Store all entries here
-    all_entries = []
-
-    # Store the headers from the first page to use for all pages
-    global_headers = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"PDF contains {len(pdf.pages)} pages")
-
-        # First pass: Get headers from first page
-        first_page = pdf.pages[0]
-        tables = first_page.extract_tables()
-
-        if tables and len(tables) > 0 and len(tables[0]) > 0:
-            # Get headers from the first table on the first page
-            headers = [clean_text(cell) if cell else "" for cell in tables[0][0]]
-
-            # Normalize headers
-            for header in headers:
-                if not header:
-                    global_headers.append("")
-                    continue
-
-                if "course" in header.lower():
-                    global_headers.append("Course")
-                elif "section" in header.lower() or "sec" in header.lower():
-                    global_headers.append("Section")
-                elif "date" in header.lower():
-                    global_headers.append("Mid Date")
-                elif "start" in header.lower() or "from" in header.lower():
-                    global_headers.append("Start Time")
-                elif "end" in header.lower() or "to" in header.lower():
-                    global_headers.append("End Time")
-                elif "room" in header.lower():
-                    global_headers.append("Room.")
-                elif "dept" in header.lower():
-                    global_headers.append("Dept.")
-                elif "sl" in header.lower() or "serial" in header.lower() or "#" in header:
-                    global_headers.append("SL.")
-                else:
-                    global_headers.append(header)
-
-            print(f"Extracted global headers: {global_headers}")
-        else:
-            print("Warning: Could not extract headers from first page!")
-            # Fallback default headers
-            global_headers = ["Course", "Section", "Mid Date", "Start Time", "End Time", "Room.", "Dept."]
-
-        # Second pass: Process all pages using the global headers
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"Processing page {page_num}...")
-
-            # Extract tables from the current page
-            tables = page.extract_tables()
-
-            if tables:
-                print(f"  Found {len(tables)} tables on page {page_num}")
-
-                for table_idx, table in enumerate(tables):
-                    if not table:
-                        continue
-
-                    # For first page, skip the header row
-                    start_row = 1 if page_num == 1 else 0
-
-                    for row in table[start_row:]:
-                        if not row or all(cell is None or (isinstance(cell, str) and cell.strip() == "") for cell in row):
-                            continue
-
-                        entry = {}
-                        for i, cell in enumerate(row):
-                            if i < len(global_headers) and cell and global_headers[i]:
-                                value = clean_text(cell)
-                                if value:
-                                    entry[global_headers[i]] = value
-
-                        # Standardize date and time fields
-                        if "Mid Date" in entry:
-                            entry["Mid Date"] = standardize_date(entry["Mid Date"])
-
-                        if "Start Time" in entry:
-                            entry["Start Time"] = standardize_time(entry["Start Time"])
-
-                        if "End Time" in entry:
-                            entry["End Time"] = standardize_time(entry["End Time"])
-
-                        # Only include valid entries
-                        if is_valid_entry(entry):
-                            all_entries.append(entry)
-                            print(f"    Added entry: Course={entry.get('Course')}, Section={entry.get('Section')}")
-                        else:
-                            missing = [field for field in ["Course", "Section", "Mid Date"] if field not in entry or not entry[field]]
-                            print(f"    Skipping invalid entry, missing: {missing}")
-            else:
-                print(f"  No tables found on page {page_num}")
-
-    print(f"Total valid entries extracted: {len(all_entries)}")
-
-    # Create final output with metadata
-    output = {
-        "metadata": {
-            "source": pdf_path,
-            "generated_at": datetime.now().isoformat(),
-            "total_entries": len(all_entries),
-            "fields_description": {
-                "Course": "Course code",
-                "Section": "Class section number",
-                "Mid Date": "Examination date (YYYY-MM-DD)",
-                "Start Time": "Exam start time (24-hour format)",
-                "End Time": "Exam end time (24-hour format)",
-                "Room.": "Examination room",
-                "Dept.": "Department offering the course"
-            }
-        },
-        "exams": all_entries
-    }
-
-    # Write the data to a JSON file
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-
-    print(f"Converted PDF data has been written to {json_path}")
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE_MB
+import run_stats
+import schedule_engine
+import schedule_store
+
+log = logging.getLogger(__name__)
+
+def convert_pdf_to_json(pdf_path, json_path, workers=1, use_cache=True,
+                         cache_path=DEFAULT_CACHE_PATH, cache_size_mb=DEFAULT_CACHE_SIZE_MB,
+                         use_template=False, template_path=None, store_path=None, use_text=False, replace_stored=False):
+    """Convert the midterm exam schedule PDF with the engine's midterm profile"""
+    totals = schedule_engine.convert(pdf_path, {"mid": json_path}, workers=workers, use_cache=use_cache,
+                                     cache_path=cache_path, cache_size_mb=cache_size_mb,
+                                     use_template=use_template, template_path=template_path, use_text=use_text)
+    if store_path:
+        with schedule_store.ScheduleStore(store_path) as store:
+            store.import_file(json_path, replace=replace_stored)
+    return totals["mid"]
 
 if __name__ == "__main__":
-    # Check for proper command-line arguments
-    if len(sys.argv) < 3:
-        print("Usage: python convert_schedule.py input.pdf output.json")
+    parser = argparse.ArgumentParser(description='Convert the midterm exam schedule PDF to JSON')
+    parser.add_argument('pdf_path', help='Input schedule PDF')
+    parser.add_argument('json_path', help='Output JSON file')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes for page extraction (0 = one per CPU core, default: 1)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-extract every page, ignoring the page cache')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Page cache file (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f'Page cache size cap in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--template', action='store_true',
+                        help='Learn the table grid from the first page and reuse it on every page')
+    parser.add_argument('--template-file', help='Table template to load, or to save after learning it (implies --template)')
+    parser.add_argument('--text-rows', action='store_true',
+                        help='Read rows from the text layer, extracting tables only on pages that do not fit the row grammar')
+    parser.add_argument('--store', nargs='?', const=schedule_store.DEFAULT_STORE_PATH, metavar='PATH',
+                        help=f'Also keep the output in the per-semester store (default: {schedule_store.DEFAULT_STORE_PATH})')
+    parser.add_argument('--replace', action='store_true',
+                        help='With --store, overwrite a stored schedule of the same semester and exam type whose rows differ')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+    if args.replace and not args.store:
+        parser.error("--replace only applies with --store")
+
+    run_stats.configure_logging(args.quiet, args.verbose)
+    try:
+        with run_stats.profiled(args.profile, args.profiler):
+            convert_pdf_to_json(args.pdf_path, args.json_path, workers=args.workers, use_cache=not args.no_cache,
+                                cache_path=args.cache, cache_size_mb=args.cache_size,
+                                use_template=args.template, template_path=args.template_file, store_path=args.store,
+                                use_text=args.text_rows, replace_stored=args.replace)
+    except schedule_store.StoreConflict as e:
+        # The output is written; only the store was left alone
+        log.error(e)
         sys.exit(1)
-
-    pdf_path = sys.argv[1]
-    json_path = sys.argv[2]
-    convert_pdf_to_json(pdf_path, json_path)
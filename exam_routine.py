@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+exam_routine.py
+
+One command line for the schedule tools:
+
+    convert    convert the final exam schedule PDF (pdf_converter.py)
+    set-title  set the exam name and semester (set_title.py)
+    query      look up courses and sections in exam_data.json
+    diff       compare two schedule revisions (schedule_diff.py)
+
+convert, set-title and diff run those scripts' own command lines, so they
+take the same arguments (`python exam_routine.py convert --help`). Every
+command imports only what it uses: pdfplumber and pdfminer are loaded by
+convert, and by diff when one side is a PDF, never by set-title or query.
+
+query does not parse the data file. It checks the course and section
+against the lookup index (`exam_data.index.json`) and reads the rows from
+the course's shard (`exam_shards/`, written with --shards) when the shard
+manifest was cut from the same data file as the index. Without usable
+shards it says so on stderr and loads the whole data file, which is
+slower; an index that is missing or was built from other data is rebuilt
+from it in memory.
+
+Usage:
+    python exam_routine.py convert examData.pdf exam_data.json --index --shards
+    python exam_routine.py set-title "Final Exam" "Fall-2025"
+    python exam_routine.py query CSE220:3 MAT120
+    python exam_routine.py diff examData.pdf.bak examData.pdf
+
+The exit status of query is 1 if a course or section is not in the schedule.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Commands that run another script's command line: name -> (module, help)
+SCRIPTS = {
+    "convert": ("pdf_converter", "Convert the final exam schedule PDF to JSON (takes pdf_converter.py's arguments)"),
+    "set-title": ("set_title", "Set the exam name and semester (takes set_title.py's arguments)"),
+    "diff": ("schedule_diff", "List the rows added, removed or changed between two revisions "
+                              "(takes schedule_diff.py's arguments)"),
+}
+
+# Courses suggested when a course code is not in the schedule
+MAX_SUGGESTIONS = 8
+
+
+def run_script(prog, module, args):
+    """Run a script's command line with `args`, reporting usage errors under `prog`"""
+    import runpy
+
+    sys.argv = [prog, *args]
+    runpy.run_module(module, run_name='__main__')
+
+
+def load_index(json_path):
+    """(index, data) for a data file: its lookup index, and the parsed data if the index had to be rebuilt"""
+    import schedule_index
+
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+
+    index_path = schedule_index.index_path_for(json_path)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        # Hashing the bytes is far cheaper than parsing them
+        if index.get("data_hash") == schedule_index.content_hash(raw):
+            return index, None
+        print(f"{index_path} was built from other data; reading {json_path}", file=sys.stderr)
+    except (OSError, ValueError):
+        print(f"No lookup index at {index_path}; reading {json_path}", file=sys.stderr)
+
+    data = json.loads(raw)
+    return schedule_index.build_index(data, raw, os.path.basename(json_path)), data
+
+
+def shard_rows(shard_dir, manifest, course):
+    """Rows of a course from its shard, or None if there are no shards or the shard cannot be read"""
+    if manifest is None:
+        return None
+
+    shard = next((shard for shard in manifest["shards"].values() if course in shard["courses"]), None)
+    try:
+        with open(os.path.join(shard_dir, shard["file"]), 'r', encoding='utf-8') as f:
+            rows = [exam for exam in json.load(f)["exams"] if exam["Course"] == course]
+    except (OSError, ValueError, TypeError):
+        return None
+    return rows
+
+
+def query(json_path, targets):
+    """Rows for (course, section or None) targets, plus one message per target that is not in the schedule"""
+    import schedule_shards
+
+    index, data = load_index(json_path)
+    shard_dir = schedule_shards.shard_dir_for(json_path)
+    # Not needed when the index was rebuilt from the parsed data
+    manifest = schedule_shards.read_manifest(shard_dir) if data is None else None
+    fallback = f"no shards in {shard_dir} (write them with convert --shards)"
+    # Shards cut from another version of the data file would give stale rows
+    if manifest is not None and manifest.get("data_hash") != index["data_hash"]:
+        fallback = f"{shard_dir} was cut from other data"
+        manifest = None
+    rows, missing = [], []
+    for course, section in targets:
+        sections = index["sections"].get(course)
+        if sections is None:
+            similar = [code for code in index["courses"] if code[:3] == course[:3]][:MAX_SUGGESTIONS]
+            missing.append(f"{course} is not in the schedule" + (f" (similar: {', '.join(similar)})" if similar else ""))
+            continue
+        if section is not None and section not in sections:
+            missing.append(f"{course} has no section {section} (sections: {', '.join(sections)})")
+            continue
+
+        course_rows = shard_rows(shard_dir, manifest, course)
+        if course_rows is None:
+            if data is None:
+                if manifest is not None:
+                    fallback = f"the shard of {course} could not be read"
+                print(f"Reading the rows from {json_path}: {fallback}", file=sys.stderr)
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            offsets = sorted(offset for offsets in sections.values() for offset in offsets)
+            course_rows = [data["exams"][offset] for offset in offsets]
+        rows.extend(exam for exam in course_rows if section is None or str(exam["Section"]) == section)
+    return rows, missing
+
+
+def parse_target(value):
+    """(COURSE, section or None) from a COURSE or COURSE:SECTION argument"""
+    course, _, section = value.partition(':')
+    return course.strip().upper(), section.strip() or None
+
+
+def format_row(exam):
+    """One line describing an exam row"""
+    date = exam.get("Final Date") or exam.get("Mid Date")
+    return f"{exam['Course']:<8} {exam['Section']:<5} {date}  {exam['Start Time']}-{exam['End Time']}  {exam.get('Room.', '')}"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='exam_routine.py', description='Convert, name, query and compare exam schedules')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+    for name, (module, help_text) in SCRIPTS.items():
+        # The script parses its own arguments, --help included
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    query_parser = commands.add_parser('query', help='Look up courses and sections in exam_data.json')
+    query_parser.add_argument('targets', nargs='+', metavar='COURSE[:SECTION]', help='e.g. CSE220:3 or MAT120')
+    query_parser.add_argument('--file', '-f', default='exam_data.json', help='Path to exam_data.json')
+    query_parser.add_argument('--json', action='store_true', help='Print the matching rows as JSON')
+
+    args, extra = parser.parse_known_args()
+    if args.command in SCRIPTS:
+        run_script(f"{parser.prog} {args.command}", SCRIPTS[args.command][0], extra)
+        return
+    if extra:
+        query_parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if not os.path.exists(args.file):
+        query_parser.error(f"file not found: {args.file}")
+    rows, missing = query(args.file, [parse_target(value) for value in args.targets])
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        for exam in rows:
+            print(format_row(exam))
+    for message in missing:
+        print(message, file=sys.stderr)
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == '__main__':
+    main()
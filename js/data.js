@@ -4,10 +4,24 @@ let examData = [];
 let availableCourses = new Set();
 let isFinalsSchedule = false;
 let courseSections = {};
+let examLookup = new Map();
+let shardFiles = new Map();
+let shardLoads = new Map();
+let slotDataHash = null;
+let slotIndexLoad = null;
 
 const EXAM_STATUS_URL = 'https://connect-cdn.itzmrz.xyz/exam_status.json';
 const SEMESTER_STATUS_URL = 'https://connect-cdn.itzmrz.xyz/status.json';
 const EXAMS_FALLBACK_URL = 'https://connect-cdn.itzmrz.xyz/exams.json';
+const LOCAL_DATA_URL = 'exam_data.json';
+const LOCAL_INDEX_URL = 'exam_data.index.json';
+const LOCAL_COMPACT_URL = 'exam_data.compact.json';
+const LOCAL_SHARD_DIR = 'exam_shards/';
+const LOCAL_TITLE_URL = 'exam_data.title.json';
+const LOCAL_SLOTS_URL = 'exam_data.slots.json';
+// How long a missing exam_data.compact.json is remembered before it is requested again
+const COMPACT_RETRY_MS = 24 * 60 * 60 * 1000;
+const COMPACT_MISSING_KEY = 'examDataCompactMissing';
 const OFFICIAL_WINDOW_DAYS = 10;
 const TRUSTED_SCHEDULE_HOSTS = new Set([
     'bracu-exam-routine.itzmrz.xyz',
@@ -174,7 +188,7 @@ async function resolveSchedule(localData) {
         }
 
         if (record?.confirmed && record.dataUrl && nearExam) {
-            const officialData = await fetchJson(normalizeOfficialUrl(record.dataUrl));
+            const officialData = expandExamData(await fetchJson(normalizeOfficialUrl(record.dataUrl)));
             if (!officialData || !Array.isArray(officialData.exams)) {
                 throw new Error('official schedule has an invalid exam_data shape');
             }
@@ -217,18 +231,299 @@ async function resolveSchedule(localData) {
     };
 }
 
+/** Fetch the small course/section index that pdf_converter.py --index writes. */
+async function fetchLocalIndex() {
+    try {
+        const index = await fetchJson(LOCAL_INDEX_URL);
+        if (!index || !index.data_hash || !Array.isArray(index.courses) || !index.sections) {
+            throw new Error('index has an invalid shape');
+        }
+        return index;
+    } catch (error) {
+        console.warn('Local schedule index unavailable, loading full data:', error.message);
+        return null;
+    }
+}
+
+/** Fetch the naming sidecar that set_title.py writes; null when there is none. */
+async function fetchLocalTitle() {
+    try {
+        const title = await fetchJson(LOCAL_TITLE_URL);
+        return title && typeof title === 'object' ? title : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+/** Merge the set_title.py sidecar over local metadata; it is newer than any naming inside the data. */
+function withLocalTitle(data, title) {
+    if (!data || !title) return data;
+    return { ...data, metadata: { ...(data.metadata || {}), ...title } };
+}
+
+async function sha256Hex(buffer) {
+    const digest = await crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+function decodeBox(box) {
+    if (!box) return null;
+    const [x0, y0, x1, y1] = box;
+    return box.length > 4 ? { x0, y0, x1, y1, exact: Boolean(box[4]) } : { x0, y0, x1, y1 };
+}
+
+/** Expand the columnar file written by compact_json.py into rows; row data is returned as is. */
+function expandExamData(payload) {
+    if (!payload || payload.format !== 'columnar') return payload;
+
+    const columns = payload.fields.map(field => {
+        const column = payload.columns[field];
+        if (field === 'BoundingBox') return column.map(decodeBox);
+        // Dictionary-encoded fields store each distinct value once
+        return Array.isArray(column) ? column : column.codes.map(code => column.values[code]);
+    });
+
+    const exams = new Array(payload.count);
+    for (let row = 0; row < payload.count; row++) {
+        const exam = {};
+        payload.fields.forEach((field, i) => { exam[field] = columns[i][row]; });
+        exams[row] = exam;
+    }
+    // Fields some rows did not have stay absent instead of becoming null
+    for (const [field, rows] of Object.entries(payload.absent || {})) {
+        for (const row of rows) delete exams[row][field];
+    }
+    return { metadata: payload.metadata || {}, exams };
+}
+
+/** Check if the compact file was missing for this data file recently; saves a 404 per page load. */
+function isCompactKnownMissing(hash) {
+    try {
+        const missing = JSON.parse(localStorage.getItem(COMPACT_MISSING_KEY) || 'null');
+        return Boolean(missing) && missing.hash === hash && Date.now() - missing.at < COMPACT_RETRY_MS;
+    } catch (error) {
+        return false;
+    }
+}
+
+function rememberCompactMissing(hash) {
+    try {
+        localStorage.setItem(COMPACT_MISSING_KEY, JSON.stringify({ hash, at: Date.now() }));
+    } catch (error) {
+        // Storage may be unavailable (private mode); the file is just requested again
+    }
+}
+
+/**
+ * Fetch exam_data.compact.json if it was published. It records the hash of the
+ * exam_data.json it was built from; when there is an index and the hashes
+ * differ, the compact file is stale and null is returned so exam_data.json is
+ * loaded instead.
+ */
+async function fetchCompactData(index) {
+    const hash = index ? index.data_hash.replace(/^sha256:/, '') : null;
+    if (isCompactKnownMissing(hash)) return null;
+
+    const url = hash ? `${LOCAL_COMPACT_URL}?v=${hash.slice(0, 16)}` : LOCAL_COMPACT_URL;
+    try {
+        const response = await fetch(url, { cache: hash ? 'default' : 'no-store' });
+        if (response.status === 404) rememberCompactMissing(hash);
+        if (!response.ok) return null;
+        const payload = await response.json();
+        if (payload?.format !== 'columnar') return null;
+        if (index && payload.source_hash !== index.data_hash) {
+            console.warn('exam_data.compact.json does not match its index, loading exam_data.json');
+            return null;
+        }
+        return { data: expandExamData(payload), index };
+    } catch (error) {
+        console.warn('Compact schedule data unavailable, loading exam_data.json:', error.message);
+        return null;
+    }
+}
+
+/**
+ * Fetch the local schedule, preferring the compact copy over exam_data.json.
+ * With an index the URL carries the content hash, so the browser may cache
+ * it; the index offsets are only used if the hash matches.
+ */
+async function fetchLocalData(index) {
+    const compact = await fetchCompactData(index);
+    if (compact) return compact;
+
+    const hash = index ? index.data_hash.replace(/^sha256:/, '') : null;
+    const url = hash ? `${LOCAL_DATA_URL}?v=${hash.slice(0, 16)}` : LOCAL_DATA_URL;
+    const response = await fetch(url, { cache: hash ? 'default' : 'no-store' });
+    if (!response.ok) throw new Error('Network response was not ok');
+
+    const buffer = await response.arrayBuffer();
+    let indexMatches = false;
+    if (hash && window.crypto?.subtle) {
+        indexMatches = (await sha256Hex(buffer)) === hash;
+        if (!indexMatches) console.warn('exam_data.json does not match its index, rebuilding lookups');
+    }
+    return {
+        data: JSON.parse(new TextDecoder().decode(buffer)),
+        index: indexMatches ? index : null
+    };
+}
+
+/** Fetch the shard manifest that pdf_converter.py --shards writes. */
+async function fetchShardManifest() {
+    try {
+        const manifest = await fetchJson(`${LOCAL_SHARD_DIR}manifest.json`);
+        if (!manifest || !Array.isArray(manifest.courses) || !manifest.sections || !manifest.shards) {
+            throw new Error('manifest has an invalid shape');
+        }
+        return manifest;
+    } catch (error) {
+        console.warn('Exam shards unavailable, loading full data:', error.message);
+        return null;
+    }
+}
+
+function isUsableExam(exam) {
+    return exam.Course && exam.Section &&
+        (exam['Mid Date'] || exam['Final Date']) &&
+        exam['Start Time'] && exam['End Time'];
+}
+
+function toDisplayExam(exam) {
+    const dateField = exam['Final Date'] ? 'Final Date' : 'Mid Date';
+    return {
+        date: utils.formatDateFromJSON(exam[dateField]),
+        time: utils.convertTimeFromJSON(exam['Start Time'], exam['End Time']),
+        courseCode: exam.Course,
+        section: String(exam.Section),
+        classroom: exam['Room.'] || 'TBA',
+        pageNumber: exam['Page Number'] || -1,
+        boundingBox: exam.BoundingBox || null,
+        slot: { date: exam[dateField], start: exam['Start Time'], end: exam['End Time'] }
+    };
+}
+
+function lookupKey(courseCode, section) {
+    return `${String(courseCode).toLowerCase()}|${section}`;
+}
+
+function addToLookup(exam) {
+    const key = lookupKey(exam.courseCode, exam.section);
+    if (!examLookup.has(key)) examLookup.set(key, { exams: [] });
+    examLookup.get(key).exams.push(exam);
+}
+
+/** Build the course list, section sets and (course, section) lookup from exam rows. */
+function indexExams(exams, index) {
+    availableCourses = new Set();
+    courseSections = {};
+    examLookup = new Map();
+    shardFiles = new Map();
+
+    if (index) {
+        // Precomputed by schedule_index.py: no scan over the rows needed
+        examData = exams;
+        for (const course of index.courses) {
+            availableCourses.add(course);
+            courseSections[course] = new Set(Object.keys(index.sections[course] || {}));
+            for (const [section, offsets] of Object.entries(index.sections[course] || {})) {
+                examLookup.set(lookupKey(course, section), { offsets });
+            }
+        }
+        return index.courses.reduce((total, course) =>
+            total + Object.values(index.sections[course] || {}).reduce((n, offsets) => n + offsets.length, 0), 0);
+    }
+
+    examData = exams.filter(isUsableExam).map(toDisplayExam);
+    for (const exam of examData) {
+        availableCourses.add(exam.courseCode);
+        if (!courseSections[exam.courseCode]) courseSections[exam.courseCode] = new Set();
+        courseSections[exam.courseCode].add(exam.section);
+        addToLookup(exam);
+    }
+    return examData.length;
+}
+
+/** Set up courses and sections from the shard manifest; rows arrive per shard in loadCourse(). */
+function indexShards(manifest) {
+    availableCourses = new Set(manifest.courses);
+    courseSections = {};
+    examLookup = new Map();
+    shardFiles = new Map();
+    shardLoads = new Map();
+    examData = [];
+
+    for (const course of manifest.courses) {
+        courseSections[course] = new Set(manifest.sections[course] || []);
+    }
+    for (const shard of Object.values(manifest.shards)) {
+        for (const course of shard.courses) shardFiles.set(course.toLowerCase(), shard.file);
+    }
+    return manifest.total_entries;
+}
+
+/**
+ * Make sure the rows of a course are loaded before findExams() is called.
+ * Without shards every row is already in memory and this resolves at once.
+ */
+function loadCourse(courseCode) {
+    const file = shardFiles.get(String(courseCode).toLowerCase());
+    if (!file) return Promise.resolve();
+
+    if (!shardLoads.has(file)) {
+        // Shard names carry their content hash, so the browser may cache them
+        const load = fetch(`${LOCAL_SHARD_DIR}${file}`, { cache: 'default' })
+            .then(response => {
+                if (!response.ok) throw new Error(`shard request returned ${response.status}`);
+                return response.json();
+            })
+            .then(shard => {
+                const exams = (shard.exams || []).filter(isUsableExam).map(toDisplayExam);
+                examData.push(...exams);
+                exams.forEach(addToLookup);
+            })
+            .catch(error => {
+                // Let the next lookup retry instead of caching the failure
+                shardLoads.delete(file);
+                throw error;
+            });
+        shardLoads.set(file, load);
+    }
+    return shardLoads.get(file);
+}
+
 /** Load the current phase schedule, preferring CDN fallback or confirmed PDF. */
 async function loadScheduleData() {
     console.log('Fetching exam data...');
     try {
-        const response = await fetch('exam_data.json', { cache: 'no-store' });
-        if (!response.ok) throw new Error('Network response was not ok');
+        // The index carries the local metadata, so the full file is only
+        // downloaded when the local schedule is actually the one shown
+        const [localIndex, localTitle] = await Promise.all([fetchLocalIndex(), fetchLocalTitle()]);
+        const indexData = localIndex ? withLocalTitle({ metadata: localIndex.metadata }, localTitle) : null;
+        let local = localIndex ? null : await fetchLocalData(null);
+        if (local) local.data = withLocalTitle(local.data, localTitle);
+        const resolved = await resolveSchedule(local ? local.data : indexData);
+
+        if (resolved.source === 'local-fallback' && !local) {
+            // Prefer per-course shards; the index already has the metadata they leave out
+            // Shards cut from another exam_data.json would show stale rows
+            const manifest = await fetchShardManifest();
+            const shardsMatch = manifest?.data_hash === localIndex.data_hash;
+            if (manifest && !shardsMatch) console.warn('Exam shards do not match exam_data.json, loading full data');
+            local = shardsMatch
+                ? { data: { metadata: indexData.metadata, exams: [] }, manifest }
+                : await fetchLocalData(localIndex);
+            local.data = withLocalTitle(local.data, localTitle);
+            resolved.data = local.data;
+            resolved.examType = getExamType(local.data?.metadata);
+            resolved.semesterKey = normalizeSemesterKey(local.data?.metadata?.semester);
+        }
 
-        const localData = await response.json();
-        const resolved = await resolveSchedule(localData);
         const data = resolved.data;
         const metadata = data.metadata || {};
         isFinalsSchedule = resolved.examType === 'final';
+        // The slot index only describes the local data file it was built from
+        slotDataHash = resolved.source === 'local-fallback' && localIndex ? localIndex.data_hash : null;
+        slotIndexLoad = null;
         window.examScheduleSource = resolved.source;
         window.examScheduleWarning = resolved.warning;
 
@@ -252,32 +547,14 @@ async function loadScheduleData() {
             ui.updateTitle(isFinalsSchedule);
         }
 
-        examData = (Array.isArray(data.exams) ? data.exams : [])
-            .filter(exam => exam.Course && exam.Section &&
-                (exam['Mid Date'] || exam['Final Date']) &&
-                exam['Start Time'] && exam['End Time'])
-            .map(exam => {
-                const courseCode = exam.Course;
-                const section = String(exam.Section);
-                const dateField = exam['Final Date'] ? 'Final Date' : 'Mid Date';
-
-                availableCourses.add(courseCode);
-                if (!courseSections[courseCode]) courseSections[courseCode] = new Set();
-                courseSections[courseCode].add(section);
-
-                return {
-                    date: utils.formatDateFromJSON(exam[dateField]),
-                    time: utils.convertTimeFromJSON(exam['Start Time'], exam['End Time']),
-                    courseCode,
-                    section,
-                    classroom: exam['Room.'] || 'TBA',
-                    pageNumber: exam['Page Number'] || -1,
-                    boundingBox: exam.BoundingBox || null
-                };
-            });
+        const exams = Array.isArray(data.exams) ? data.exams : [];
+        const isLocal = resolved.source === 'local-fallback';
+        const entryCount = isLocal && local?.manifest
+            ? indexShards(local.manifest)
+            : indexExams(exams, isLocal && local?.index ? local.index : null);
 
-        console.log('Loaded exam data:', examData.length, 'entries');
-        ui.showToast(`Loaded ${examData.length} exam entries successfully`, 'success');
+        console.log('Loaded exam data:', entryCount, 'entries');
+        ui.showToast(`Loaded ${entryCount} exam entries successfully`, 'success');
     } catch (error) {
         console.error('Error loading schedule data:', error);
         ui.showToast('Error loading schedule data. Please refresh the page.', 'error');
@@ -285,10 +562,98 @@ async function loadScheduleData() {
 }
 
 function findExams(courseCode, section) {
-    return examData.filter(exam =>
-        exam.courseCode.toLowerCase() === courseCode.toLowerCase() &&
-        exam.section === section
-    );
+    const match = examLookup.get(lookupKey(courseCode, section));
+    if (!match) return [];
+    if (!match.exams) {
+        // Index lookups hold row offsets; convert them on first use
+        match.exams = match.offsets.map(offset => toDisplayExam(examData[offset]));
+    }
+    return match.exams.slice();
+}
+
+/**
+ * Fetch the slot index that pdf_converter.py --slots writes, once, and only for
+ * the local data file it was built from; null when it is missing or stale.
+ */
+function loadSlotIndex() {
+    if (!slotDataHash) return Promise.resolve(null);
+    if (!slotIndexLoad) {
+        const hash = slotDataHash;
+        slotIndexLoad = fetch(`${LOCAL_SLOTS_URL}?v=${hash.replace(/^sha256:/, '').slice(0, 16)}`, { cache: 'default' })
+            .then(response => response.ok ? response.json() : null)
+            .then(index => {
+                if (!index || index.data_hash !== hash || !Array.isArray(index.slots)) return null;
+                const slotOf = new Map();
+                index.slots.forEach((slot, id) => {
+                    for (const [course, sections] of Object.entries(slot.sections)) {
+                        for (const section of sections) {
+                            const key = lookupKey(course, section);
+                            if (!slotOf.has(key)) slotOf.set(key, []);
+                            slotOf.get(key).push(id);
+                        }
+                    }
+                });
+                const clashes = new Map(Object.entries(index.clashes || {}).map(([id, others]) => [Number(id), new Set(others)]));
+                return { slots: index.slots, slotOf, clashes };
+            })
+            .catch(error => {
+                console.warn('Slot index unavailable, checking clashes from the rows:', error.message);
+                return null;
+            });
+    }
+    return slotIndexLoad;
+}
+
+function slotMinutes(value) {
+    const match = String(value || '').trim().match(/^(\d{1,2}):(\d{2})$/);
+    return match ? Number(match[1]) * 60 + Number(match[2]) : null;
+}
+
+/** Same date and overlapping times; times that cannot be compared only clash when identical. */
+function slotsOverlap(slot, other) {
+    if (slot.date !== other.date) return false;
+    if (slot.start === other.start && slot.end === other.end) return true;
+    const [start, end, otherStart, otherEnd] = [slot.start, slot.end, other.start, other.end].map(slotMinutes);
+    if ([start, end, otherStart, otherEnd].includes(null)) return false;
+    return start < otherEnd && otherStart < end;
+}
+
+/**
+ * Clashing pairs among chosen [courseCode, section] pairs: exams on the same date
+ * with overlapping times. With the slot index each pair is a few lookups in its
+ * precomputed clash map; without it the slots of the chosen rows are compared.
+ * Rows of sharded courses must already be loaded with loadCourse().
+ */
+async function findClashes(selection) {
+    const index = await loadSlotIndex();
+    const keys = [...new Map(selection.map(([courseCode, section]) =>
+        [lookupKey(courseCode, String(section).trim()), [String(courseCode).trim().toUpperCase(), String(section).trim()]])).entries()];
+
+    const slotsOf = key => index
+        ? (index.slotOf.get(key) || []).map(id => ({ id, ...index.slots[id] }))
+        : (examLookup.has(key) ? findExams(...key.split('|')).map(exam => exam.slot) : []);
+    const clash = index
+        ? (slot, other) => slot.id === other.id || Boolean(index.clashes.get(slot.id)?.has(other.id))
+        : slotsOverlap;
+
+    const chosen = keys.map(([key, names]) => ({ names, slots: slotsOf(key) }));
+    const found = [];
+    chosen.forEach((first, i) => {
+        for (const second of chosen.slice(i + 1)) {
+            for (const slot of first.slots) {
+                for (const other of second.slots) {
+                    if (clash(slot, other)) {
+                        found.push({
+                            sections: [first.names, second.names],
+                            date: slot.date,
+                            times: [`${slot.start}-${slot.end}`, `${other.start}-${other.end}`]
+                        });
+                    }
+                }
+            }
+        }
+    });
+    return found;
 }
 
 function getAvailableCourses() {
@@ -305,7 +670,9 @@ function isFinalsScheduleLoaded() {
 
 window.data = {
     loadScheduleData,
+    loadCourse,
     findExams,
+    findClashes,
     getAvailableCourses,
     getSectionsForCourse,
     isFinalsScheduleLoaded
@@ -74,21 +74,69 @@ function addCourseFromInput(index) {
     const section = sectionInput.value.trim();
 
     if (courseCode && section) {
-        // Find matching exams in the data
-        const matchingExams = data.findExams(courseCode, section);
-
-        if (matchingExams.length > 0) {
-            // Add matching exams to the schedule
-            ui.addExamsToSchedule(matchingExams);
-            ui.showToast(`Added ${courseCode} Section ${section} to exam schedule`, 'success');
-        } else {
-            ui.showToast(`No exam found for ${courseCode} Section ${section}`, 'error');
-        }
+        // Fetch the course's shard first when the schedule is sharded
+        data.loadCourse(courseCode).then(() => {
+            // Find matching exams in the data
+            const matchingExams = data.findExams(courseCode, section);
+
+            if (matchingExams.length > 0) {
+                // Add matching exams to the schedule
+                ui.addExamsToSchedule(matchingExams);
+                ui.showToast(`Added ${courseCode} Section ${section} to exam schedule`, 'success');
+                checkClashes(courseCode, section);
+            } else {
+                ui.showToast(`No exam found for ${courseCode} Section ${section}`, 'error');
+            }
+        }).catch(error => {
+            console.error(`Error loading exams for ${courseCode}:`, error);
+            ui.showToast(`Could not load exams for ${courseCode}. Please try again.`, 'error');
+        });
     } else {
         ui.showToast('Please enter both course code and section', 'error');
     }
 }
 
+/**
+ * Mark the schedule rows whose exam clashes with another chosen course,
+ * and warn about the clashes of the course that was just added
+ * @param {string} courseCode - The course code just added
+ * @param {string} section - The section just added
+ */
+function checkClashes(courseCode, section) {
+    const rows = Array.from(document.querySelectorAll('#schedule-body tr'));
+    if (rows.length < 2) return;
+
+    const selection = rows.map(row => [row.cells[2].textContent, row.cells[3].textContent]);
+    data.findClashes(selection).then(clashes => {
+        rows.forEach(row => {
+            row.classList.remove('clash');
+            row.removeAttribute('title');
+        });
+
+        const rowFor = ([course, sec]) => rows.find(row =>
+            row.cells[2].textContent.toUpperCase() === course && row.cells[3].textContent.trim() === sec);
+        clashes.forEach(clash => {
+            clash.sections.forEach((names, i) => {
+                const row = rowFor(names);
+                if (!row) return;
+                const [otherCourse, otherSection] = clash.sections[1 - i];
+                row.classList.add('clash');
+                row.title = [row.title, `Clashes with ${otherCourse} Section ${otherSection}`].filter(Boolean).join('\n');
+            });
+        });
+
+        const added = [courseCode.toUpperCase(), section];
+        const mine = clashes.filter(clash => clash.sections.some(([course, sec]) => course === added[0] && sec === added[1]));
+        if (mine.length > 0) {
+            const others = mine.map(clash => {
+                const [course, sec] = clash.sections.find(([c, s]) => c !== added[0] || s !== added[1]);
+                return `${course} Section ${sec}`;
+            });
+            ui.showToast(`Exam clash: ${added[0]} Section ${section} overlaps ${[...new Set(others)].join(', ')}`, 'error');
+        }
+    }).catch(error => console.warn('Clash check failed:', error));
+}
+
 /**
  * Adds more course input rows
  */
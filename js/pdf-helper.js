@@ -1,5 +1,10 @@
 // pdf-helper.js - PDF helper functions for the exam routine application
 
+// Pre-rendered row images written by row_crops.py
+const CROP_DIR = 'exam_crops/';
+const CROP_MANIFEST_URL = `${CROP_DIR}manifest.json`;
+const CROP_MANIFEST_VERSION = 1;
+
 /**
  * Converts an ArrayBuffer to a base64 string
  * @param {ArrayBuffer} buffer - The buffer to convert
@@ -118,9 +123,29 @@ function enhancedCrossCheck(exams) {
     // Create a loading indicator
     const loadingElement = document.createElement('div');
     loadingElement.className = 'text-white text-center py-4';
-    loadingElement.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Loading PDF...';
+    loadingElement.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Loading...';
     pdfContainer.appendChild(loadingElement);
 
+    // Pre-rendered row images (row_crops.py) are a few KB each; the whole PDF is only needed without them
+    fetchCropManifest()
+        .then(manifest => {
+            if (manifest && exams.every(exam => cropUrlFor(manifest, exam))) {
+                renderExamCrops(manifest, exams, pdfContainer, loadingElement);
+            } else {
+                crossCheckFromPdf(exams, pdfContainer, loadingElement);
+            }
+        });
+}
+
+/**
+ * Load the PDF and render the cross-check from it
+ * @param {Array} exams - The exams to display PDF pages for
+ * @param {HTMLElement} pdfContainer - The container to render into
+ * @param {HTMLElement} loadingElement - The loading indicator element
+ */
+function crossCheckFromPdf(exams, pdfContainer, loadingElement) {
+    loadingElement.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Loading PDF...';
+
     // Try loading and rendering the PDF
     const possiblePdfUrls = [
         'examData.pdf',
@@ -159,6 +184,89 @@ function enhancedCrossCheck(exams) {
         });
 }
 
+/**
+ * Fetch the manifest of the pre-rendered row images
+ * @returns {Promise<Object|null>} - The manifest, or null if there are no crops
+ */
+function fetchCropManifest() {
+    // Revalidated every time; the images it names are content-addressed and cache normally
+    return fetch(CROP_MANIFEST_URL, { cache: 'no-cache' })
+        .then(response => response.ok ? response.json() : null)
+        .then(manifest => manifest && manifest.version === CROP_MANIFEST_VERSION && manifest.pages ? manifest : null)
+        .catch(() => null);
+}
+
+/**
+ * URL of an exam's pre-rendered row image, named like row_crops.py names it
+ * @param {Object} manifest - The crop manifest
+ * @param {Object} exam - The exam object
+ * @returns {string|null} - The image URL, or null if the exam has no crop
+ */
+function cropUrlFor(manifest, exam) {
+    const pageDir = manifest.pages[String(exam.pageNumber)];
+    if (!pageDir || !exam.boundingBox || typeof exam.boundingBox.y0 !== 'number') {
+        return null;
+    }
+    return `${CROP_DIR}${pageDir}/${Math.floor(Math.round(exam.boundingBox.y0 * 100) / 10)}.png`;
+}
+
+/**
+ * Show the pre-rendered row image of every exam
+ * @param {Object} manifest - The crop manifest
+ * @param {Array} exams - The exams to display
+ * @param {HTMLElement} container - The container to render into
+ * @param {HTMLElement} loadingElement - The loading indicator element
+ */
+function renderExamCrops(manifest, exams, container, loadingElement) {
+    const header = document.createElement('div');
+    header.className = 'text-xl font-bold text-white text-center mb-4';
+    header.textContent = 'Cross-Check Your Exams';
+
+    container.removeChild(loadingElement);
+    container.appendChild(header);
+
+    let fellBack = false;
+    exams.forEach(exam => {
+        const examContainer = document.createElement('div');
+        examContainer.className = 'bg-gray-900 rounded-lg p-4 mb-4';
+        examContainer.innerHTML = `
+            <div class="text-white mb-2 text-center">
+                <span class="font-bold">${exam.courseCode}</span>
+                <span>Section ${exam.section}</span>
+                <div class="text-xs text-gray-300 mt-1">
+                    ${exam.date} • ${exam.time} • Room ${exam.classroom}
+                </div>
+                <div class="text-xs text-gray-400 mt-1">
+                    PDF Page: ${exam.pageNumber}
+                </div>
+            </div>
+        `;
+
+        const img = document.createElement('img');
+        img.src = cropUrlFor(manifest, exam);
+        img.alt = `${exam.courseCode} Section ${exam.section} in the PDF`;
+        img.loading = 'lazy';
+        img.className = 'w-full rounded';
+        img.style.cssText = 'background:#fff;cursor:zoom-in;';
+        img.addEventListener('click', () => openFullScreenModal(img.src));
+        // A crop can go missing when the site is redeployed mid-session; the PDF always works
+        img.addEventListener('error', () => {
+            if (fellBack) return;
+            fellBack = true;
+            console.warn('Row image missing, falling back to the PDF:', img.src);
+            container.innerHTML = '';
+            container.appendChild(loadingElement);
+            crossCheckFromPdf(exams, container, loadingElement);
+        });
+
+        const imgContainer = document.createElement('div');
+        imgContainer.className = 'overflow-x-auto';
+        imgContainer.appendChild(img);
+        examContainer.appendChild(imgContainer);
+        container.appendChild(examContainer);
+    });
+}
+
 /**
  * Renders a PDF with exam information
  * @param {string} pdfDataUrl - The PDF data URL
@@ -360,9 +468,10 @@ function renderExamPage(pdfDocument, pageNum, exam, container) {
                     [x0, pdfY0, x1, pdfY1]
                 );
 
-                // Add 5% more width on both sides of the highlight
+                // Add 4% more width on both sides of an estimated highlight;
+                // exact boxes already cover the full table row
                 const highlightWidth = right - left;
-                const extraWidth = highlightWidth * 0.04; // 4% extra on each side
+                const extraWidth = exam.boundingBox.exact === true ? 0 : highlightWidth * 0.04;
                 const expandedLeft = left - extraWidth;
                 const expandedRight = right + extraWidth;
 
@@ -478,6 +587,9 @@ window.pdfHelper = {
     fetchPdfAsDataUrl,
     tryPdfUrls,
     enhancedCrossCheck,
+    fetchCropManifest,
+    cropUrlFor,
+    renderExamCrops,
     renderPdfWithExams,
     renderExamPage,
     findPagesForExams,
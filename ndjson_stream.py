@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+ndjson_stream.py
+
+Streaming NDJSON output for the converters, and the step that turns the
+stream back into the usual `exam_data.json` shape.
+
+The stream is one exam row per line, written page by page as rows are
+extracted. The run's metadata is only known at the end, so it goes into a
+sidecar next to the stream (`exam_data.ndjson` -> `exam_data.meta.json`).
+
+Usage:
+    python ndjson_stream.py exam_data.ndjson exam_data.json
+
+Assembling reads the stream one line at a time, so memory use does not
+grow with the size of the schedule. The result is byte-for-byte what
+json.dump(..., indent=2) would have written for the same rows.
+Site files that already exist next to the output (index, compact copy,
+shards, slots) are refreshed from it, as a JSON conversion would.
+"""
+import argparse
+import json
+import logging
+import os
+
+import run_stats
+from atomic_file import atomic_write
+
+log = logging.getLogger(__name__)
+
+def metadata_path(ndjson_path):
+    """Path of the metadata sidecar that goes with an NDJSON stream"""
+    return os.path.splitext(ndjson_path)[0] + '.meta.json'
+
+
+def write_rows(f, entries):
+    """Append one page's rows to an open NDJSON stream"""
+    for entry in entries:
+        f.write(json.dumps(entry, ensure_ascii=False))
+        f.write('\n')
+    # Push each finished page out so readers can follow the stream
+    f.flush()
+
+
+def write_metadata(ndjson_path, metadata):
+    """Write the metadata sidecar for an NDJSON stream"""
+    with atomic_write(metadata_path(ndjson_path)) as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+
+def iter_ndjson(ndjson_path):
+    """Yield the rows of an NDJSON stream one at a time"""
+    with open(ndjson_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def indent_json(value, level):
+    """Serialize `value` with indent=2 as if it were nested `level` levels deep"""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + '  ' * level)
+
+
+def write_json(out, metadata, entries):
+    """Write {"metadata": ..., "exams": [...]} to `out` one row at a time; returns the row count"""
+    total = 0
+    out.write('{\n  "metadata": ' + indent_json(metadata, 1) + ',\n  "exams": [')
+    for entry in entries:
+        out.write(',\n    ' if total else '\n    ')
+        out.write(indent_json(entry, 2))
+        total += 1
+    out.write('\n  ]\n}' if total else ']\n}')
+    return total
+
+
+def assemble_json(ndjson_path, json_path):
+    """Build the {"metadata": ..., "exams": [...]} file from a stream and its sidecar"""
+    with open(metadata_path(ndjson_path), 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    with atomic_write(json_path) as out:
+        total = write_json(out, metadata, iter_ndjson(ndjson_path))
+
+    log.info(f"Assembled {total} entries from {ndjson_path} into {json_path}")
+
+    # Imported here: the converter loads every site file writer, which writing the stream never needs
+    import pdf_converter
+    pdf_converter.refresh_site_files(json_path)
+    return total
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Assemble exam_data.json from an NDJSON stream and its metadata sidecar')
+    parser.add_argument('ndjson_path', help='NDJSON stream written with --format ndjson')
+    parser.add_argument('json_path', help='Output JSON file (e.g., exam_data.json)')
+    args = parser.parse_args()
+
+    assemble_json(args.ndjson_path, args.json_path)
@@ -0,0 +1,111 @@
+"""
+page_cache.py
+
+On-disk cache of extracted rows, one entry per PDF page.
+
+Entries are keyed by a hash of the page's content streams plus a salt
+(converter version, column headers), so when the registrar republishes a
+schedule with only a few pages changed, only those pages are re-parsed.
+The cache is a single SQLite file capped in size with least-recently-used
+eviction.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'pages.sqlite')
+DEFAULT_CACHE_SIZE_MB = 64
+
+
+def page_fingerprint(page, *salt):
+    """Hash a pdfplumber page's content streams, media box and fonts together with `salt`"""
+    # Imported here so the cache settings can be read without loading pdfminer
+    from pdfminer.pdftypes import resolve1
+
+    page_obj = page.page_obj
+    digest = hashlib.sha256()
+
+    for value in salt:
+        digest.update(json.dumps(value, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+
+    digest.update(repr(page_obj.mediabox).encode('utf-8'))
+    fonts = resolve1(page_obj.resources.get('Font')) or {}
+    for name in sorted(fonts):
+        digest.update(name.encode('utf-8'))
+        font = resolve1(fonts[name])
+        if isinstance(font, dict):
+            digest.update(repr(font.get('BaseFont')).encode('utf-8'))
+
+    for stream in page_obj.contents:
+        digest.update(stream.get_data())
+
+    return digest.hexdigest()
+
+
+class PageCache:
+    """SQLite-backed page → rows cache with a size cap and LRU eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' key TEXT PRIMARY KEY,'
+            ' rows TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)')
+        self.conn.commit()
+
+    def has(self, key):
+        """Check whether `key` is cached without loading its rows"""
+        return self.conn.execute('SELECT 1 FROM pages WHERE key = ?', (key,)).fetchone() is not None
+
+    def get(self, key):
+        """Return the cached rows for `key`, or None on a miss"""
+        found = self.conn.execute('SELECT rows FROM pages WHERE key = ?', (key,)).fetchone()
+        if found is None:
+            return None
+
+        self.conn.execute('UPDATE pages SET last_used = ? WHERE key = ?', (time.time(), key))
+        self.conn.commit()
+        return json.loads(found[0])
+
+    def put(self, key, rows):
+        """Store the rows for `key` and evict the least recently used pages over the cap"""
+        payload = json.dumps(rows, ensure_ascii=False)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (key, rows, size, last_used) VALUES (?, ?, ?, ?)',
+            (key, payload, len(payload.encode('utf-8')), time.time())
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self.conn.execute('SELECT key, size FROM pages ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM pages WHERE key = ?', (key,))
+            total -= size
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
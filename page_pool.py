@@ -0,0 +1,121 @@
+"""
+page_pool.py
+
+Helpers for spreading PDF page extraction across a process pool.
+
+Each worker opens the PDF itself and extracts a contiguous range of pages,
+returning one plain, JSON-serializable result per page (for the converters,
+schedule_engine's page model). Results come back in page order, so merging
+them gives exactly the same row order as a serial run. Pages found in a
+PageCache are skipped entirely.
+"""
+import logging
+import os
+
+import run_stats
+from page_cache import page_fingerprint
+
+log = logging.getLogger(__name__)
+
+
+def resolve_workers(workers):
+    """Turn a --workers value into a process count (0 means one per CPU core)"""
+    if workers is None or workers < 0:
+        return 1
+    if workers == 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def split_pages(page_numbers, workers):
+    """Split a list of page numbers into at most `workers` contiguous ranges"""
+    workers = max(1, min(workers, len(page_numbers)))
+    size, extra = divmod(len(page_numbers), workers)
+
+    ranges = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append(page_numbers[start:end])
+        start = end
+    return ranges
+
+
+def extract_with_stats(extract_pages, pdf_path, page_numbers, *args):
+    """Worker entry point: run extract_pages and send the worker's run stats back with the rows"""
+    run_stats.start_run()
+    return extract_pages(pdf_path, page_numbers, *args), run_stats.stats.snapshot()
+
+
+def run_page_pool(extract_pages, pdf_path, page_numbers, workers, *args):
+    """Run extract_pages(pdf_path, page_numbers, *args) over a process pool
+
+    Yields one result per page, in the order of `page_numbers`, as soon as the
+    range holding that page has finished.
+    """
+    # Imported here: it loads multiprocessing, which serial runs and callers of the helpers never need
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = split_pages(page_numbers, workers)
+    log.info(f"Extracting {len(page_numbers)} pages with {len(ranges)} worker processes")
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(extract_with_stats, extract_pages, pdf_path, page_numbers, *args)
+                   for page_numbers in ranges]
+        # Collect in submission order, not completion order, to keep the merge deterministic
+        for future in futures:
+            results, snapshot = future.result()
+            run_stats.stats.merge(snapshot)
+            yield from results
+
+
+def iter_page_entries(pdf, pdf_path, page_args, extract_page_entries, extract_pages,
+                      workers=1, cache=None, cache_salt=(), page_numbers=None):
+    """Yield (page_num, entries) for every page in page order, reusing cached pages
+
+    `page_args` are passed after the page to extract_page_entries(page, page_num, *page_args)
+    and extract_pages(pdf_path, page_numbers, *page_args). Each page's parsed layout is
+    released once its entries are extracted, so only one page is held in memory at a time.
+    With `page_numbers`, only those pages are extracted and yielded.
+    """
+    pages = [(page_num, page) for page_num, page in enumerate(pdf.pages, 1)
+             if page_numbers is None or page_num in page_numbers]
+    page_keys = {}
+    missing = []
+
+    for page_num, page in pages:
+        if cache is not None:
+            page_keys[page_num] = page_fingerprint(page, *cache_salt, *page_args, page_num)
+            if cache.has(page_keys[page_num]):
+                continue
+        missing.append(page_num)
+
+    if cache is not None:
+        log.info(f"Page cache: {len(pages) - len(missing)} pages cached, {len(missing)} to extract")
+
+    pooled = None
+    if missing and workers > 1:
+        pooled = run_page_pool(extract_pages, pdf_path, missing, workers, *page_args)
+
+    missing = set(missing)
+    for page_num, page in pages:
+        entries = None
+        if page_num not in missing:
+            # None only if the page was evicted since the lookup above
+            entries = cache.get(page_keys[page_num])
+            if entries is not None:
+                run_stats.count("pages_cached")
+
+        if entries is None:
+            if page_num in missing and pooled is not None:
+                entries = next(pooled)
+            else:
+                entries = extract_page_entries(page, page_num, *page_args)
+                page.close()
+
+            if cache is not None:
+                run_stats.count("cache_misses")
+                cache.put(page_keys[page_num], entries)
+
+        yield page_num, entries
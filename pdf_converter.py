@@ -1,320 +1,146 @@
+import argparse
+import logging
+import os
 import sys
-import json
-import re
-from datetime import datetime
-import pdfplumber
-
-def clean_text(text):
-    """Clean text by removing extra whitespace"""
-    if text is None:
-        return None
-    return re.sub(r'\s+', ' ', text).strip()
-
-def standardize_date(date_str):
-    """Standardize date format to ISO (YYYY-MM-DD)"""
-    if not date_str or not isinstance(date_str, str):
-        return date_str
-
-    try:
-        # For format like "20-Mar-25"
-        dt = datetime.strptime(date_str.strip(), "%d-%b-%y")
-        return dt.strftime("%Y-%m-%d")
-    except ValueError:
-        return date_str
-
-def standardize_time(time_str):
-    """Standardize time format to 24-hour (HH:MM)"""
-    if not time_str or not isinstance(time_str, str):
-        return time_str
-
-    try:
-        # For format like "12:00 PM"
-        dt = datetime.strptime(time_str.strip(), "%I:%M %p")
-        return dt.strftime("%H:%M")
-    except ValueError:
-        return time_str
-
-def is_valid_entry(entry):
-    """Check if an entry has the minimum required fields to be considered valid"""
-    required_fields = ["Course", "Section", "Final Date"]
-    return all(field in entry and entry[field] for field in required_fields)
-
-def is_header_row(row, headers):
-    """Check if a row is likely a header row"""
-    if not row:
-        return False
-    # Check if the row contains typical header text
-    header_texts = ['course', 'section', 'date', 'time', 'room', 'dept']
-    row_text = ' '.join(str(cell).lower() for cell in row if cell)
-    return any(text in row_text for text in header_texts)
-
-def convert_pdf_to_json(pdf_path, json_path):
-    print(f"Processing {pdf_path}...")
-
-    # Store all entries here
-    all_entries = []
-
-    # Store the headers from the first page to use for all pages
-    global_headers = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"PDF contains {len(pdf.pages)} pages")
-
-        # First pass: Get headers from first page
-        first_page = pdf.pages[0]
-        tables = first_page.extract_tables()
-
-        if tables and len(tables) > 0 and len(tables[0]) > 0:
-            # Get headers from the first table on the first page
-            headers = [clean_text(cell) if cell else "" for cell in tables[0][0]]
-
-            # Normalize headers
-            for header in headers:
-                if not header:
-                    global_headers.append("")
-                    continue
-
-                if "course" in header.lower():
-                    global_headers.append("Course")
-                elif "section" in header.lower() or "sec" in header.lower():
-                    global_headers.append("Section")
-                elif "date" in header.lower():
-                    global_headers.append("Final Date")
-                elif "start" in header.lower() or "from" in header.lower():
-                    global_headers.append("Start Time")
-                elif "end" in header.lower() or "to" in header.lower():
-                    global_headers.append("End Time")
-                elif "room" in header.lower():
-                    global_headers.append("Room.")
-                elif "dept" in header.lower():
-                    global_headers.append("Dept.")
-                elif "sl" in header.lower() or "serial" in header.lower() or "#" in header:
-                    global_headers.append("SL.")
-                else:
-                    global_headers.append(header)
-
-            print(f"Extracted global headers: {global_headers}")
-        else:
-            print("Warning: Could not extract headers from first page!")
-            # Fallback default headers
-            global_headers = ["Course", "Section", "Final Date", "Start Time", "End Time", "Room.", "Dept."]
-
-        # Second pass: Process all pages using the global headers
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"Processing page {page_num}...")
-
-            # Extract all text lines from the page (in reading order)
-            page_text = page.extract_text() or ""
-            text_lines = page_text.splitlines()
-
-            # Extract tables from the current page
-            tables = page.extract_tables()
-
-            if tables:
-                print(f"  Found {len(tables)} tables on page {page_num}")
-
-                for table_idx, table in enumerate(tables):
-                    if not table:
-                        continue
-
-                    for row_idx, row in enumerate(table):
-                        # Skip header row on every page
-                        if row == table[0]:
-                            continue
-                        if not row or all(cell is None or (isinstance(cell, str) and cell.strip() == "") for cell in row):
-                            continue
-                        if is_header_row(row, global_headers):
-                            continue
-
-                        entry = {}
-                        for i, cell in enumerate(row):
-                            if i < len(global_headers) and cell and global_headers[i]:
-                                value = clean_text(cell)
-                                if value:
-                                    entry[global_headers[i]] = value
-
-                        # Build the full row text as it appears in the PDF (concatenated, space-separated)
-                        row_text = ' '.join([clean_text(str(cell)) for cell in row if cell])
-                        entry["RowText"] = row_text
-
-                        # Get all words with positions from the page
-                        words = page.extract_words()                        # Improved bounding box calculation
-                        try:
-                            # Find SL cell - it's usually the first column
-                            sl_cell = None
-                            if len(row) > 0 and row[0] is not None:
-                                sl_cell = clean_text(str(row[0]))
-
-                            # Also try to find SL cell using headers
-                            sl_index = -1
-                            for i, header in enumerate(global_headers):
-                                if header == "SL.":
-                                    sl_index = i
-                                    break
-
-                            if sl_index >= 0 and sl_index < len(row) and row[sl_index] is not None:
-                                sl_cell = clean_text(str(row[sl_index]))
-
-                            # Find the SL cell in the words list
-                            matched_words = []
-                            if sl_cell:
-                                # Try exact match for SL cell
-                                sl_matches = [w for w in words if clean_text(w.get('text', '')) == sl_cell]
-
-                                # If found, use this as the position reference
-                                if sl_matches:
-                                    matched_words = [sl_matches[0]]
-                                else:
-                                    # If SL cell wasn't found, fall back to normal matching for all cells
-                                    for cell in row:
-                                        cell_text = clean_text(str(cell))
-                                        if not cell_text:
-                                            continue
-
-                                        cell_matches = [w for w in words
-                                                      if clean_text(w.get('text', '')) == cell_text
-                                                      and w not in matched_words]
-
-                                        if cell_matches:
-                                            matched_words.append(cell_matches[0])
-                                            break
-
-                            # If still no matches, try the old approach
-                            if not matched_words:
-                                for cell in row:
-                                    cell_text = clean_text(str(cell))
-                                    if not cell_text:
-                                        continue
-
-                                    # Try exact matches first
-                                    cell_matches = [w for w in words
-                                                  if clean_text(w.get('text', '')) == cell_text
-                                                  and w not in matched_words]                                    # If found, add the first match
-                                    if cell_matches:
-                                        matched_words.append(cell_matches[0])
-                                        break
-
-                            # Calculate bounding box for the row with safeguards
-                            if matched_words:
-                                # Keep the standard horizontal coordinates as they appear consistent in the examples
-                                standard_x0 = 89.664
-                                standard_x1 = 506.66303999999997
-
-                                # Get the actual y-coordinates from the SL cell - this ensures each row has unique coordinates
-                                # that match its actual position in the PDF
-                                y0 = float(matched_words[0]['top'])
-                                y1 = float(matched_words[0]['bottom'])
-
-                                # Create the bounding box with actual coordinates from the SL cell
-                                entry["BoundingBox"] = {
-                                    "x0": standard_x0,
-                                    "y0": y0,
-                                    "x1": standard_x1,
-                                    "y1": y1
-                                }
-                            else:
-                                # Fallback if no words matched - generate unique values based on row index
-                                # Each row gets a unique position based on its index
-                                base_y = 100 + (row_idx * 15)  # Create a vertical spacing of 15 units
-                                entry["BoundingBox"] = {
-                                    "x0": 90.0,
-                                    "y0": base_y,
-                                    "x1": 500.0,
-                                    "y1": base_y + 10  # Height of 10 units per row
-                                }
-                        except Exception as e:
-                            print(f"    Error calculating bounding box: {e}")
-                            # Provide a fallback bounding box with unique values
-                            base_y = 100 + (row_idx * 15)  # Create a vertical spacing of 15 units
-                            entry["BoundingBox"] = {
-                                "x0": 90.0,
-                                "y0": base_y,
-                                "x1": 500.0,
-                                "y1": base_y + 10,  # Height of 10 units per row
-                                "error": str(e)
-                            }
-
-                        # Standardize date and time fields
-                        if "Final Date" in entry:
-                            entry["Final Date"] = standardize_date(entry["Final Date"])
-                        if "Start Time" in entry:
-                            entry["Start Time"] = standardize_time(entry["Start Time"])
-                        if "End Time" in entry:
-                            entry["End Time"] = standardize_time(entry["End Time"])
-                        if "Section" in entry:
-                            entry["Section"] = str(entry["Section"])
-
-                        # Find the first matching line in the PDF text for this entry
-                        line_number_in_pdf = None
-                        for idx, line in enumerate(text_lines, 1):
-                            # Match Course and Section (and optionally more fields)
-                            if entry.get("Course") and entry.get("Section"):
-                                if entry["Course"] in line and entry["Section"] in line:
-                                    line_number_in_pdf = idx
-                                    break
-                        # Fallback if not found
-                        if line_number_in_pdf is None:
-                            line_number_in_pdf = -1
-
-                        entry["Page Number"] = page_num
-                        entry["Line Number"] = line_number_in_pdf
-
-                        if is_valid_entry(entry):
-                            all_entries.append(entry)
-                            print(f"    Added entry: Course={entry.get('Course')}, Section={entry.get('Section')}, Page={page_num}, Line={line_number_in_pdf}")
-                        else:
-                            print(f"    Skipping invalid entry")
-            else:
-                print(f"  No tables found on page {page_num}")
-
-    print(f"Total valid entries extracted: {len(all_entries)}")
-
-    # Create final output with metadata
-    output = {
-        "metadata": {
-            "source": pdf_path,
-            "generated_at": datetime.now().isoformat(),
-            "total_entries": len(all_entries),
-            "fields_description": {
-                "Course": "Course code",
-                "Section": "Class section number",
-                "Final Date": "Examination date (YYYY-MM-DD)",
-                "Start Time": "Exam start time (24-hour format)",
-                "End Time": "Exam end time (24-hour format)",
-                "Room.": "Examination room",
-                "Dept.": "Department offering the course",
-                "Page Number": "Page number from which the entry was extracted",
-                "Line Number": "Line number from which the entry was extracted",
-                "RowText": "Full concatenated text of the row as it appears in the PDF",
-                "BoundingBox": "Coordinates of the row in the PDF (x0, y0, x1, y1)"
-            }
-        },
-        "exams": all_entries
-    }
-
-    # Write the data to a JSON file with error handling
-    try:
-        # Open file in write mode with truncation
-        with open(json_path, 'w+', encoding='utf-8') as f:
-            # Truncate the file to ensure it's empty
-            f.truncate(0)
-            # Write the new data
-            json.dump(output, f, indent=2, ensure_ascii=False)
-            # Ensure data is written to disk
-            f.flush()
-        print(f"Successfully wrote {len(all_entries)} entries to {json_path}")
-    except Exception as e:
-        print(f"Error writing to {json_path}: {e}")
-        raise  # Re-raise the exception after logging
-
-    return len(all_entries)  # Return the number of entries for verification
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE_MB
+import compact_json
+import row_crops
+import run_stats
+import schedule_engine
+import schedule_index
+import schedule_shards
+import schedule_slots
+import schedule_store
+import schedule_watch
+import set_title
+
+log = logging.getLogger(__name__)
+
+def convert_pdf_to_json(pdf_path, json_path, workers=1, use_cache=True,
+                         cache_path=DEFAULT_CACHE_PATH, cache_size_mb=DEFAULT_CACHE_SIZE_MB,
+                         use_template=False, template_path=None, output_format='json', write_index=False,
+                         write_shards=False, shard_by=None, write_compact=False, keep_title=False, store_path=None,
+                         write_crops=False, write_slots=False, use_text=False, replace_stored=False):
+    """Convert the final exam schedule PDF with the engine's final profile, then refresh the site files"""
+    # The exam name/semester/title set with set_title.py, read before the output is replaced
+    title = set_title.read_title(json_path) if keep_title else None
+    totals = schedule_engine.convert(pdf_path, {"final": json_path}, workers=workers, use_cache=use_cache,
+                                     cache_path=cache_path, cache_size_mb=cache_size_mb,
+                                     use_template=use_template, template_path=template_path,
+                                     output_format=output_format, use_text=use_text)
+    if output_format == 'ndjson':
+        return totals["final"]
+
+    # Keep the naming in its sidecar with a new last_updated (moving it there if it was still inline)
+    if title:
+        set_title.write_title(json_path, title)
+
+    refresh_site_files(json_path, write_index, write_compact, write_shards, shard_by, write_slots)
+
+    # Row images for the cross-check viewer; only pages whose rows changed are rendered again
+    if write_crops or os.path.exists(os.path.join(row_crops.crop_dir_for(json_path), row_crops.MANIFEST_NAME)):
+        row_crops.write_crops(pdf_path, json_path, workers=workers)
+
+    # Keep a copy per semester and exam type
+    if store_path:
+        with schedule_store.ScheduleStore(store_path) as store:
+            store.import_file(json_path, replace=replace_stored)
+
+    return totals["final"]  # Return the number of entries for verification
+
+
+def refresh_site_files(json_path, write_index=False, write_compact=False, write_shards=False, shard_by=None,
+                       write_slots=False):
+    """Write the requested site files built from a data file, and refresh the ones that already exist"""
+    # Course/section lookup index for the front end, tied to this file's content hash;
+    # an existing index is always refreshed so it never goes stale
+    if write_index or os.path.exists(schedule_index.index_path_for(json_path)):
+        schedule_index.write_index(json_path)
+
+    # Columnar copy with .gz/.br siblings for the site to download; refreshed like the index
+    if write_compact or os.path.exists(compact_json.compact_path_for(json_path)):
+        compact_json.write_compact(json_path)
+
+    # Per-course shards so the site only downloads the courses it looks up; refreshed like the index
+    shard_dir = schedule_shards.shard_dir_for(json_path)
+    if write_shards or schedule_shards.read_manifest(shard_dir) is not None:
+        schedule_shards.write_shards(json_path, shard_dir, shard_by)
+
+    # Exam slots and their overlaps for the clash check; refreshed like the index
+    if write_slots or os.path.exists(schedule_slots.slots_path_for(json_path)):
+        schedule_slots.write_slots(json_path)
 
 if __name__ == "__main__":
-    # Check for proper command-line arguments
-    if len(sys.argv) < 3:
-        print("Usage: python pdf_converter.py input.pdf output.json")
-        sys.exit(1)
-
-    pdf_path = sys.argv[1]
-    json_path = sys.argv[2]
-    convert_pdf_to_json(pdf_path, json_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Convert the final exam schedule PDF to JSON')
+    parser.add_argument('pdf_path', help='Input schedule PDF (e.g., examData.pdf)')
+    parser.add_argument('json_path', help='Output JSON file (e.g., exam_data.json, or exam_data.ndjson with --format ndjson)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes for page extraction (0 = one per CPU core, default: 1)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-extract every page, ignoring the page cache')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Page cache file (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f'Page cache size cap in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--template', action='store_true',
+                        help='Learn the table grid from the first page and reuse it on every page')
+    parser.add_argument('--template-file', help='Table template to load, or to save after learning it (implies --template)')
+    parser.add_argument('--text-rows', action='store_true',
+                        help='Read rows from the text layer, extracting tables only on pages that do not fit the row grammar')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='json writes exam_data.json; ndjson streams one row per line with a .meta.json sidecar')
+    parser.add_argument('--index', action='store_true',
+                        help='Also write the course/section lookup index (exam_data.index.json); an existing index is always refreshed')
+    parser.add_argument('--compact', action='store_true',
+                        help='Also write the columnar exam_data.compact.json with .gz/.br siblings; an existing one is always refreshed')
+    parser.add_argument('--shards', action='store_true',
+                        help='Also split the rows into per-course shards under exam_shards/; existing shards are always refreshed')
+    parser.add_argument('--shard-by', choices=['prefix', 'course'],
+                        help='One shard per course-code prefix (ACT, CSE, ...) or per course (default: keep the current layout, else prefix)')
+    parser.add_argument('--slots', action='store_true',
+                        help='Also write the exam slot index for clash checks (exam_data.slots.json); an existing one is always refreshed')
+    parser.add_argument('--crops', action='store_true',
+                        help=f'Also pre-render a cross-check image per row under {row_crops.DEFAULT_CROP_DIR}/; existing crops are always refreshed')
+    parser.add_argument('--store', nargs='?', const=schedule_store.DEFAULT_STORE_PATH, metavar='PATH',
+                        help=f'Also keep the output in the per-semester store (default: {schedule_store.DEFAULT_STORE_PATH})')
+    parser.add_argument('--replace', action='store_true',
+                        help='With --store, overwrite a stored schedule of the same semester and exam type whose rows differ')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-convert whenever the PDF changes, keeping the set_title.py naming')
+    parser.add_argument('--poll-interval', type=float, default=schedule_watch.DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between checks of the PDF with --watch (default: {schedule_watch.DEFAULT_POLL_INTERVAL:g})')
+    parser.add_argument('--debounce', type=float, default=schedule_watch.DEFAULT_DEBOUNCE,
+                        help=f'Seconds the PDF must stay unchanged before converting with --watch (default: {schedule_watch.DEFAULT_DEBOUNCE:g})')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+    if args.watch and args.format == 'ndjson':
+        parser.error("--watch writes exam_data.json; it cannot be combined with --format ndjson")
+    if args.replace and not args.store:
+        parser.error("--replace only applies with --store")
+    # Site files are built from exam_data.json, which an NDJSON run does not write
+    site_flags = [flag for flag, given in (('--index', args.index), ('--compact', args.compact),
+                                           ('--shards', args.shards), ('--slots', args.slots),
+                                           ('--crops', args.crops), ('--store', args.store)) if given]
+    if args.format == 'ndjson' and site_flags:
+        parser.error(f"{', '.join(site_flags)} cannot be combined with --format ndjson; "
+                     "assemble exam_data.json with ndjson_stream.py, which refreshes the site files")
+
+    def convert():
+        try:
+            convert_pdf_to_json(args.pdf_path, args.json_path, workers=args.workers, use_cache=not args.no_cache,
+                                cache_path=args.cache, cache_size_mb=args.cache_size,
+                                use_template=args.template, template_path=args.template_file, output_format=args.format,
+                                write_index=args.index, write_shards=args.shards, shard_by=args.shard_by,
+                                write_compact=args.compact, keep_title=args.watch, store_path=args.store,
+                                write_crops=args.crops, write_slots=args.slots, use_text=args.text_rows,
+                                replace_stored=args.replace)
+        except schedule_store.StoreConflict as e:
+            # The output and site files are written; only the store was left alone
+            log.error(e)
+            if not args.watch:
+                sys.exit(1)
+
+    run_stats.configure_logging(args.quiet, args.verbose)
+    with run_stats.profiled(args.profile, args.profiler):
+        if args.watch:
+            schedule_watch.watch(args.pdf_path, convert, args.poll_interval, args.debounce)
+        else:
+            convert()
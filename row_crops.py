@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""
+row_crops.py
+
+Pre-render the cross-check images: one small PNG per exam row, cut from
+the schedule PDF around the row's `BoundingBox` (with one row of context
+above and below, and the row tinted the way the viewer highlights it).
+The cross-check modal then fetches a few KB per exam instead of the whole
+PDF.
+
+Usage:
+    python row_crops.py examData.pdf exam_data.json
+    python row_crops.py examData.pdf exam_data.json --workers 4
+
+Layout of the output directory (`exam_crops/` next to the data file):
+
+    manifest.json             {"pages": {"<page>": "<page dir>"}, ...}
+    p<page>.<hash>/<key>.png  one image per row; <key> is y0 in 0.1 pt
+
+A page directory's hash covers the page's content, the row boxes on it
+and the render settings. Pages whose directory already exists are not
+rendered again, the others are rendered in parallel worker processes,
+and directories no longer in the manifest are removed. Since a name
+changes whenever its images do, the images can be cached forever.
+
+pdfplumber, pypdfium2 and Pillow are only imported once crops are
+rendered, so the converters can import this module for its paths.
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import re
+import shutil
+
+import run_stats
+from atomic_file import atomic_write
+from page_cache import page_fingerprint
+from page_pool import resolve_workers, split_pages
+
+log = logging.getLogger(__name__)
+
+CROPS_VERSION = 1
+DEFAULT_CROP_DIR = 'exam_crops'
+MANIFEST_NAME = 'manifest.json'
+
+# 2x (144 dpi) stays sharp on high-density phone screens
+RENDER_SCALE = 2.0
+# Rows of context above and below the highlighted row, in row heights
+CONTEXT_ROWS = 1.0
+# Share of the page width trimmed off each side, as the PDF viewer does; the table spans the rest
+SIDE_TRIM = 0.09
+# Same tint as the viewer's highlight; estimated boxes are widened like it does
+HIGHLIGHT = ((255, 0, 0), 0.25)
+ESTIMATED_WIDEN = 0.04
+# A ruled table in black, grey and the tint fits in a small palette
+PALETTE_COLORS = 16
+
+PAGE_DIR_RE = re.compile(r'^p\d+\.[0-9a-f]{12}$')
+
+
+def crop_dir_for(json_path):
+    """Default crop directory for a data file"""
+    return os.path.join(os.path.dirname(json_path), DEFAULT_CROP_DIR)
+
+
+def crop_name(box):
+    """File name of a row's crop; the viewer derives the same name from the box"""
+    # y0 in tenths of a point, taken from its 0.01 pt rounding so the compact copy's boxes give the same name;
+    # halves round up as Math.round does in js/pdf-helper.js (round() would round them to even)
+    return f"{math.floor(box['y0'] * 100 + 0.5) // 10}.png"
+
+
+def page_rows(exams):
+    """{page number: [BoundingBox, ...]} for every row that can be cropped"""
+    pages = {}
+    for exam in exams:
+        box = exam.get("BoundingBox")
+        if isinstance(exam.get("Page Number"), int) and exam["Page Number"] > 0 and box:
+            pages.setdefault(exam["Page Number"], []).append(box)
+    return pages
+
+
+def render_crop(image, box):
+    """Cut one row with its context out of a rendered page and tint the row"""
+    from PIL import Image
+
+    height = box["y1"] - box["y0"]
+    widen = 0 if box.get("exact", True) else (box["x1"] - box["x0"]) * ESTIMATED_WIDEN
+    left = max(0, min(math.floor(image.width * SIDE_TRIM), math.floor((box["x0"] - widen) * RENDER_SCALE)))
+    right = min(image.width, max(math.ceil(image.width * (1 - SIDE_TRIM)), math.ceil((box["x1"] + widen) * RENDER_SCALE)))
+    top = max(0, math.floor((box["y0"] - CONTEXT_ROWS * height) * RENDER_SCALE))
+    bottom = min(image.height, math.ceil((box["y1"] + CONTEXT_ROWS * height) * RENDER_SCALE))
+    crop = image.crop((left, top, right, bottom))
+
+    row = (max(0, math.floor((box["x0"] - widen) * RENDER_SCALE) - left), round(box["y0"] * RENDER_SCALE) - top,
+           min(right, math.ceil((box["x1"] + widen) * RENDER_SCALE)) - left, round(box["y1"] * RENDER_SCALE) - top)
+    color, alpha = HIGHLIGHT
+    region = crop.crop(row)
+    crop.paste(Image.blend(region, Image.new('RGB', region.size, color), alpha), row)
+
+    buffer = io.BytesIO()
+    # Fast octree quantizing and default compression: optimize=True costs 8x the time for 1-2% smaller files
+    crop.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def render_pages(pdf_path, jobs, output_dir):
+    """Worker entry point: render each (page_num, page_dir, boxes) job's crops; returns bytes written"""
+    import pypdfium2
+
+    written = 0
+    document = pypdfium2.PdfDocument(pdf_path)
+    try:
+        for page_num, page_dir, boxes in jobs:
+            page = document[page_num - 1]
+            image = page.render(scale=RENDER_SCALE).to_pil().convert('RGB')
+            page.close()
+
+            # Fill a temporary directory and rename it into place, so a page directory is never half-written
+            temp_dir = os.path.join(output_dir, f"{page_dir}.{os.getpid()}.tmp")
+            os.makedirs(temp_dir, exist_ok=True)
+            for box in boxes:
+                payload = render_crop(image, box)
+                with open(os.path.join(temp_dir, crop_name(box)), 'wb') as f:
+                    f.write(payload)
+                written += len(payload)
+            try:
+                os.replace(temp_dir, os.path.join(output_dir, page_dir))
+            except OSError:
+                # Another run published the same page first; its images are the same
+                shutil.rmtree(temp_dir)
+    finally:
+        document.close()
+    return written
+
+
+def write_crops(pdf_path, json_path, output_dir=None, workers=0):
+    """Render the crops of every row in `json_path` from `pdf_path` into `output_dir`; returns the manifest"""
+    import pdfplumber
+
+    output_dir = output_dir or crop_dir_for(json_path)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        rows = page_rows(json.load(f).get("exams") or [])
+
+    page_dirs = {}
+    jobs = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, boxes in sorted(rows.items()):
+            if page_num > len(pdf.pages):
+                log.warning(f"Rows point at page {page_num}, but {pdf_path} has {len(pdf.pages)} pages; skipped")
+                continue
+            settings = [CROPS_VERSION, RENDER_SCALE, CONTEXT_ROWS, SIDE_TRIM, PALETTE_COLORS]
+            digest = page_fingerprint(pdf.pages[page_num - 1], settings, boxes)
+            page_dirs[page_num] = f"p{page_num}.{digest[:12]}"
+            if not os.path.isdir(os.path.join(output_dir, page_dirs[page_num])):
+                jobs.append((page_num, page_dirs[page_num], boxes))
+
+    workers = resolve_workers(workers)
+    log.info(f"Crops: {len(page_dirs) - len(jobs)} pages unchanged, {len(jobs)} to render")
+    written = 0
+    if jobs and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(render_pages, pdf_path, chunk, output_dir)
+                       for chunk in split_pages(jobs, workers)]
+            written = sum(future.result() for future in futures)
+    elif jobs:
+        written = render_pages(pdf_path, jobs, output_dir)
+
+    manifest = {
+        "version": CROPS_VERSION,
+        "scale": RENDER_SCALE,
+        "source": os.path.basename(pdf_path),
+        "pages": {str(page_num): page_dir for page_num, page_dir in page_dirs.items()}
+    }
+    # Written after every directory it names, so a published manifest never points at a missing image
+    with atomic_write(os.path.join(output_dir, MANIFEST_NAME)) as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    # Drop page directories from earlier runs that the new manifest no longer points to
+    current = set(page_dirs.values())
+    for name in os.listdir(output_dir):
+        if PAGE_DIR_RE.match(name) and name not in current:
+            shutil.rmtree(os.path.join(output_dir, name))
+
+    crops = sum(len(job[2]) for job in jobs)
+    log.info(f"Wrote {crops} row crops ({written / 1024:.0f} KB) for {len(jobs)} pages to {output_dir}")
+    return manifest
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Pre-render a small cross-check image for every exam row')
+    parser.add_argument('pdf_path', help='Schedule PDF the data was converted from (e.g., examData.pdf)')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--output-dir', '-o', help=f'Where to write the crops (default: {DEFAULT_CROP_DIR}/ next to the data file)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Worker processes for rendering (0 = one per CPU core, default: 0)')
+    args = parser.parse_args()
+
+    write_crops(args.pdf_path, args.json_path, args.output_dir, args.workers)
@@ -0,0 +1,168 @@
+"""
+run_stats.py
+
+Logging setup, stage timers and counters for converter runs.
+
+The converters log through the standard logging module instead of print():
+per-page, per-table and per-row detail is DEBUG (shown with --verbose),
+progress and results are INFO, and problems are WARNING (the only thing
+--quiet keeps). Leaving per-row lines off by default keeps console I/O out
+of the conversion time.
+
+While a run is active, any step of the pipeline can bump a counter or time
+a stage on the shared RunStats. The converters store its summary in the
+output metadata under "run". Pages extracted in worker processes send their
+stats back with their rows (see page_pool.run_page_pool), so with --workers
+the stage timings are summed over processes and can exceed the wall time.
+Pages taken from the page cache only count towards "pages_cached"; pages
+extracted while the cache is on also count towards "cache_misses".
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+
+log = logging.getLogger(__name__)
+
+QUIET_LIBRARIES = ("pdfminer", "pdfplumber", "PIL")
+
+
+def configure_logging(quiet=False, verbose=False):
+    """Send log records to stdout as plain lines, at the level picked on the command line"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.WARNING if quiet else logging.DEBUG if verbose else logging.INFO)
+
+    # pdfminer logs every object it parses at DEBUG; only its problems are of interest here
+    for library in QUIET_LIBRARIES:
+        logging.getLogger(library).setLevel(logging.WARNING)
+
+
+def add_logging_arguments(parser):
+    """Add --quiet/--verbose and the profiling options to a converter's argument parser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--quiet', '-q', action='store_true', help='Only log warnings and errors')
+    group.add_argument('--verbose', '-v', action='store_true', help='Also log every page, table and row')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Profile the run and write the result to PATH (.prof for cProfile, .html/.txt for pyinstrument)')
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'], default='cprofile',
+                        help='Profiler used with --profile (default: cprofile)')
+
+
+class RunStats:
+    """Counters and cumulative stage timings for one conversion run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counters = {}
+        self.timings = {}
+
+    def count(self, name, amount=1):
+        """Add `amount` to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Add the time spent inside the block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def snapshot(self):
+        """Counters and timings as plain data, e.g. to send back from a worker process"""
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "timings": {name: round(seconds, 4) for name, seconds in sorted(self.timings.items())}
+        }
+
+    def merge(self, snapshot):
+        """Add the counters and timings of another run's snapshot"""
+        for name, amount in snapshot["counters"].items():
+            self.count(name, amount)
+        for name, seconds in snapshot["timings"].items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def summary(self, **details):
+        """Machine-readable run summary for the output metadata"""
+        return {"wall_time": round(time.perf_counter() - self.started, 4), **details, **self.snapshot()}
+
+
+stats = RunStats()
+
+
+def start_run():
+    """Reset the shared stats at the start of a conversion"""
+    global stats
+    stats = RunStats()
+    return stats
+
+
+def count(name, amount=1):
+    """Add `amount` to a counter of the current run"""
+    stats.count(name, amount)
+
+
+def timer(name):
+    """Time a stage of the current run"""
+    return stats.timer(name)
+
+
+def log_summary(run):
+    """Log the counters and the slowest stages of a run on one line each"""
+    counters = run["counters"]
+    skipped = {name[len("rows_skipped_"):]: amount for name, amount in counters.items()
+               if name.startswith("rows_skipped_")}
+    # Both are only counted when the page cache is on
+    cache = (f"cache hits: {counters.get('pages_cached', 0)}, misses: {counters.get('cache_misses', 0)}"
+             if "pages_cached" in counters or "cache_misses" in counters else "cache off")
+    log.info(f"Pages: {counters.get('pages', 0)} ({cache}), "
+             f"tables: {counters.get('tables', 0)}, rows kept: {counters.get('rows_kept', 0)}, "
+             f"skipped: {skipped or 0}, bbox fallbacks: {counters.get('bbox_fallbacks', 0)}")
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds
+                       in sorted(run["timings"].items(), key=lambda item: -item[1]))
+    log.info(f"Time: {run['wall_time']:.2f}s ({stages or 'all pages cached'})")
+
+
+@contextlib.contextmanager
+def profiled(path=None, profiler='cprofile'):
+    """Profile the block and write the result to `path`; does nothing without a path"""
+    if not path:
+        yield
+        return
+
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            profiler = 'cprofile'
+            path = os.path.splitext(path)[0] + '.prof'
+            log.warning(f"pyinstrument is not installed, writing a cProfile profile to {path} instead")
+
+    if profiler == 'pyinstrument':
+        active = Profiler()
+        active.start()
+        try:
+            yield
+        finally:
+            active.stop()
+            output = active.output_html() if path.endswith('.html') else active.output_text()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+            log.info(f"Wrote pyinstrument profile to {path}")
+        return
+
+    import cProfile
+    active = cProfile.Profile()
+    active.enable()
+    try:
+        yield
+    finally:
+        active.disable()
+        active.dump_stats(path)
+        log.info(f"Wrote cProfile profile to {path} (view with: python -m pstats {path})")
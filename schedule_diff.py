@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+schedule_diff.py
+
+Compare two revisions of a schedule and list the rows that were added,
+removed or changed (moved to another date, time or room).
+
+Rows are matched by (Course, Section). Their position in the PDF (SL.,
+page and line numbers, row text and bounding box) is not compared, so
+rows that only moved because others were inserted above them do not show
+up as changed.
+
+Pages whose content is identical in both PDFs (same content-stream hash,
+wherever they sit in the document) hold identical rows, so they are not
+parsed or compared at all; only the pages that differ are converted. Page
+1 is always parsed for the column headers. Either side may also be a
+converted data file such as the published `exam_data.json`, which is
+compared in full.
+
+Usage:
+    python schedule_diff.py examData.pdf.bak examData.pdf
+    python schedule_diff.py exam_data.json examData.pdf --output changes.json
+    python schedule_diff.py old_mid.pdf new_mid.pdf --exam-type mid
+
+The JSON change set lists added, removed and changed rows plus the
+affected courses, e.g. to refresh only the shards that hold them.
+"""
+import argparse
+import contextlib
+import json
+import logging
+from collections import Counter
+
+import run_stats
+import schedule_engine
+from atomic_file import atomic_write
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE_MB, PageCache, page_fingerprint
+from page_pool import resolve_workers
+
+log = logging.getLogger(__name__)
+
+# Where a row sits in the PDF rather than what it says
+POSITION_FIELDS = ("SL.", "Page Number", "Line Number", "RowText", "BoundingBox")
+
+
+def is_data_file(path):
+    """Check if a side of the diff is a converted data file rather than a PDF"""
+    return path.lower().endswith('.json')
+
+
+def open_pdf(path):
+    """pdfplumber.open(), imported on first use so comparing data files does not load the PDF stack"""
+    import pdfplumber
+    return pdfplumber.open(path)
+
+
+def row_key(exam):
+    """(Course, Section) of a row"""
+    return (exam.get("Course"), str(exam.get("Section")))
+
+
+def comparable(exam):
+    """A row without its position fields"""
+    return {field: value for field, value in exam.items() if field not in POSITION_FIELDS}
+
+
+def matched_pages(old_hashes, new_hashes):
+    """Page numbers on each side whose content also appears on the other side"""
+    common = Counter(old_hashes) & Counter(new_hashes)
+
+    def pick(hashes):
+        remaining = Counter(common)
+        matched = set()
+        for page_num, digest in enumerate(hashes, 1):
+            if remaining[digest]:
+                remaining[digest] -= 1
+                matched.add(page_num)
+        return matched
+
+    return pick(old_hashes), pick(new_hashes)
+
+
+def pdf_rows(pdf, pdf_path, profile_name, skip_pages, workers=1, cache=None):
+    """Rows of a profile from every page not in `skip_pages`"""
+    page_numbers = {page_num for page_num in range(1, len(pdf.pages) + 1) if page_num not in skip_pages}
+    # Page 1 carries the column headers, even when its rows are skipped
+    page_numbers.add(1)
+
+    rows = []
+    for page_num, page_entries in schedule_engine.iter_profile_entries(pdf, pdf_path, [profile_name], None, workers,
+                                                                       cache, page_numbers=page_numbers):
+        if page_num not in skip_pages:
+            rows.extend(entry.as_dict() for entry in page_entries[profile_name])
+    return rows
+
+
+def diff_rows(old_rows, new_rows):
+    """Added, removed and changed rows between two row lists, matched by (Course, Section)"""
+    old_by_key = {}
+    for exam in old_rows:
+        old_by_key.setdefault(row_key(exam), []).append(exam)
+    new_by_key = {}
+    for exam in new_rows:
+        new_by_key.setdefault(row_key(exam), []).append(exam)
+
+    added, removed, changed = [], [], []
+    for key in sorted(old_by_key.keys() | new_by_key.keys(), key=lambda key: (str(key[0]), key[1])):
+        olds = list(old_by_key.get(key, []))
+        news = list(new_by_key.get(key, []))
+
+        # Rows that are the same on both sides (a course/section can have several) cancel out first
+        for exam in list(news):
+            match = next((old for old in olds if comparable(old) == comparable(exam)), None)
+            if match is not None:
+                olds.remove(match)
+                news.remove(exam)
+
+        for old, new in zip(olds, news):
+            before, after = comparable(old), comparable(new)
+            changes = {field: {"old": before.get(field), "new": after.get(field)}
+                       for field in list(before) + [field for field in after if field not in before]
+                       if before.get(field) != after.get(field)}
+            changed.append({"Course": key[0], "Section": key[1], "changes": changes, "old": old, "new": new})
+        removed.extend(olds[len(news):])
+        added.extend(news[len(olds):])
+
+    return added, removed, changed
+
+
+def describe(path, pages=None, compared=None):
+    """Summary of one side of a diff"""
+    side = {"source": path}
+    if pages is not None:
+        side["pages"] = pages
+        side["pages_compared"] = compared
+    return side
+
+
+def diff_schedules(old_path, new_path, profile_name="final", workers=1, use_cache=True,
+                   cache_path=DEFAULT_CACHE_PATH, cache_size_mb=DEFAULT_CACHE_SIZE_MB):
+    """Build the change set between two PDFs or converted data files"""
+    run_stats.start_run()
+    workers = resolve_workers(workers)
+    paths = (old_path, new_path)
+    # Only PDF pages are cached
+    cache = PageCache(cache_path, cache_size_mb) if use_cache and not all(map(is_data_file, paths)) else None
+
+    with contextlib.ExitStack() as stack:
+        # One entry per side (old, new); None for a data file
+        pdfs = [None if is_data_file(path) else stack.enter_context(open_pdf(path))
+                for path in paths]
+
+        # Identical pages only count when both sides are PDFs
+        skips = [set(), set()]
+        if None not in pdfs:
+            with run_stats.timer("page_hashes"):
+                hashes = [[page_fingerprint(page) for page in pdf.pages] for pdf in pdfs]
+            skips = matched_pages(*hashes)
+            log.info(f"{len(skips[0])} identical pages skipped, comparing "
+                     f"{len(pdfs[0].pages) - len(skips[0])} old and {len(pdfs[1].pages) - len(skips[1])} new pages")
+
+        rows = []
+        sides = []
+        for path, pdf, skip in zip(paths, pdfs, skips):
+            if pdf is not None:
+                rows.append(pdf_rows(pdf, path, profile_name, skip, workers, cache))
+                sides.append(describe(path, len(pdf.pages), len(pdf.pages) - len(skip)))
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    rows.append(json.load(f).get("exams") or [])
+                sides.append(describe(path))
+
+    if cache is not None:
+        cache.close()
+
+    added, removed, changed = diff_rows(*rows)
+    courses = sorted({exam.get("Course") for exam in added + removed if exam.get("Course")}
+                     | {change["Course"] for change in changed if change["Course"]})
+
+    log.info(f"{len(added)} added, {len(removed)} removed, {len(changed)} changed rows in {len(courses)} courses")
+    return {
+        "old": sides[0],
+        "new": sides[1],
+        "profile": profile_name,
+        "summary": {"added": len(added), "removed": len(removed), "changed": len(changed)},
+        "courses": courses,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "run": run_stats.stats.summary(workers=workers, cache=cache is not None)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List the rows added, removed or changed between two schedule revisions')
+    parser.add_argument('old_path', help='Earlier schedule PDF, or a converted data file such as exam_data.json')
+    parser.add_argument('new_path', help='Later schedule PDF, or a converted data file')
+    parser.add_argument('--exam-type', choices=list(schedule_engine.PROFILES), default='final',
+                        help='Which schedule the PDFs are (default: final)')
+    parser.add_argument('--output', '-o', help='Write the change set to this JSON file instead of stdout')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes for page extraction (0 = one per CPU core, default: 1)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-extract every page, ignoring the page cache')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Page cache file (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f'Page cache size cap in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    # Without --output the change set goes to stdout, so progress lines are kept off it
+    run_stats.configure_logging(args.quiet or not args.output, args.verbose)
+    with run_stats.profiled(args.profile, args.profiler):
+        changes = diff_schedules(args.old_path, args.new_path, args.exam_type, workers=args.workers,
+                                 use_cache=not args.no_cache, cache_path=args.cache, cache_size_mb=args.cache_size)
+
+    if args.output:
+        with atomic_write(args.output) as f:
+            json.dump(changes, f, indent=2, ensure_ascii=False)
+        log.info(f"Wrote the change set to {args.output}")
+    else:
+        print(json.dumps(changes, indent=2, ensure_ascii=False))
@@ -0,0 +1,537 @@
+#!/usr/bin/env python
+"""
+schedule_engine.py
+
+The extraction engine behind both schedule converters.
+
+Each page is parsed once into a page model: its text lines and, for every
+table, the table's bounding box plus each row's cells and bounding box.
+Exam-type profiles then map page models onto an output schema:
+
+    final  `Final Date` rows with RowText, BoundingBox, Page Number and
+           Line Number for the cross-check viewer (pdf_converter.py)
+    mid    `Mid Date` rows with the table cells only (convert_schedule.py)
+
+Page models do not depend on the profile, so they are what the page cache
+stores and what worker processes send back, and convert() can write any
+number of profiles from a single pass over the PDF. New exam types are
+added as another entry in PROFILES.
+
+Mapped rows are held as slotted ExamRow objects (a tuple of values against
+a field layout shared by every row with the same columns) and only become
+dicts as they are written out. A schedule repeats a few dozen date, time
+and room strings thousands of times, so the normalizers are memoized.
+
+pdfplumber and the table/text-row readers are imported where pages are
+parsed, so importing the engine for its profiles and normalizers (as the
+diff and query commands do) does not load the PDF stack.
+
+Usage:
+    python schedule_engine.py examData.pdf --final exam_data.json --mid mid_data.json
+"""
+import argparse
+import contextlib
+import functools
+import logging
+import re
+from datetime import datetime
+
+import ndjson_stream
+import run_stats
+from atomic_file import atomic_write
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE_MB, PageCache
+from page_pool import iter_page_entries, resolve_workers
+
+# Bump whenever the page model changes so cached pages are re-parsed
+ENGINE_VERSION = "engine-1"
+
+# Bounds for the memoized normalizers: dates and times number in the dozens,
+# cell texts in the low thousands for a full schedule
+DATE_TIME_CACHE_SIZE = 256
+CLEAN_TEXT_CACHE_SIZE = 8192
+
+BOX_KEYS = ("x0", "y0", "x1", "y1", "exact")
+
+log = logging.getLogger(__name__)
+
+PROFILES = {
+    "final": {
+        "date_field": "Final Date",
+        # Drop each table's first row and anything else that looks like a header
+        "header_rows": "every_table",
+        # Add RowText, BoundingBox, Page Number and Line Number to every row
+        "row_details": True,
+        "fields_description": {
+            "Course": "Course code",
+            "Section": "Class section number",
+            "Final Date": "Examination date (YYYY-MM-DD)",
+            "Start Time": "Exam start time (24-hour format)",
+            "End Time": "Exam end time (24-hour format)",
+            "Room.": "Examination room",
+            "Dept.": "Department offering the course",
+            "Page Number": "Page number from which the entry was extracted",
+            "Line Number": "Line number from which the entry was extracted",
+            "RowText": "Full concatenated text of the row as it appears in the PDF",
+            "BoundingBox": "Coordinates of the row in the PDF (x0, y0, x1, y1); exact is true when taken from the table cells, false when estimated"
+        }
+    },
+    "mid": {
+        "date_field": "Mid Date",
+        # Only the first row of page 1 is dropped, as the midterm converter always did
+        "header_rows": "first_page",
+        "row_details": False,
+        "fields_description": {
+            "Course": "Course code",
+            "Section": "Class section number",
+            "Mid Date": "Examination date (YYYY-MM-DD)",
+            "Start Time": "Exam start time (24-hour format)",
+            "End Time": "Exam end time (24-hour format)",
+            "Room.": "Examination room",
+            "Dept.": "Department offering the course"
+        }
+    }
+}
+
+
+@functools.lru_cache(maxsize=CLEAN_TEXT_CACHE_SIZE)
+def clean_text(text):
+    """Clean text by removing extra whitespace"""
+    if text is None:
+        return None
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+@functools.lru_cache(maxsize=DATE_TIME_CACHE_SIZE)
+def standardize_date(date_str):
+    """Standardize date format to ISO (YYYY-MM-DD)"""
+    if not date_str or not isinstance(date_str, str):
+        return date_str
+
+    try:
+        # For format like "20-Mar-25"
+        dt = datetime.strptime(date_str.strip(), "%d-%b-%y")
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        return date_str
+
+
+@functools.lru_cache(maxsize=DATE_TIME_CACHE_SIZE)
+def standardize_time(time_str):
+    """Standardize time format to 24-hour (HH:MM)"""
+    if not time_str or not isinstance(time_str, str):
+        return time_str
+
+    try:
+        # For format like "12:00 PM"
+        dt = datetime.strptime(time_str.strip(), "%I:%M %p")
+        return dt.strftime("%H:%M")
+    except ValueError:
+        return time_str
+
+
+class ExamRow:
+    """One exam row: its values in field order, against a field layout shared with similar rows"""
+
+    __slots__ = ("fields", "values")
+
+    # One tuple per distinct field layout, so rows with the same columns share it
+    layouts = {}
+
+    def __init__(self, entry):
+        fields = tuple(entry)
+        self.fields = self.layouts.setdefault(fields, fields)
+        self.values = tuple(entry.values())
+
+    def as_dict(self):
+        """The row as written to the output, with BoundingBox expanded to a dict"""
+        entry = dict(zip(self.fields, self.values))
+        if entry.get("BoundingBox") is not None:
+            entry["BoundingBox"] = dict(zip(BOX_KEYS, entry["BoundingBox"]))
+        return entry
+
+
+def is_valid_entry(entry, profile):
+    """Check if an entry has the minimum required fields to be considered valid"""
+    required_fields = ["Course", "Section", profile["date_field"]]
+    return all(field in entry and entry[field] for field in required_fields)
+
+
+def is_header_row(row, headers):
+    """Check if a row is likely a header row"""
+    if not row:
+        return False
+    # Check if the row contains typical header text
+    header_texts = ['course', 'section', 'date', 'time', 'room', 'dept']
+    row_text = ' '.join(str(cell).lower() for cell in row if cell)
+    return any(text in row_text for text in header_texts)
+
+
+def is_empty_row(row):
+    """Check if a row has no text in any cell"""
+    return not row or all(cell is None or (isinstance(cell, str) and cell.strip() == "") for cell in row)
+
+
+def normalize_headers(header_cells, profile):
+    """Map the raw header cells of page 1 onto the profile's field names"""
+    if header_cells is None:
+        log.warning("Could not extract headers from first page!")
+        # Fallback default headers
+        return ["Course", "Section", profile["date_field"], "Start Time", "End Time", "Room.", "Dept."]
+
+    global_headers = []
+    for header in (clean_text(cell) if cell else "" for cell in header_cells):
+        if not header:
+            global_headers.append("")
+            continue
+
+        if "course" in header.lower():
+            global_headers.append("Course")
+        elif "section" in header.lower() or "sec" in header.lower():
+            global_headers.append("Section")
+        elif "date" in header.lower():
+            global_headers.append(profile["date_field"])
+        elif "start" in header.lower() or "from" in header.lower():
+            global_headers.append("Start Time")
+        elif "end" in header.lower() or "to" in header.lower():
+            global_headers.append("End Time")
+        elif "room" in header.lower():
+            global_headers.append("Room.")
+        elif "dept" in header.lower():
+            global_headers.append("Dept.")
+        elif "sl" in header.lower() or "serial" in header.lower() or "#" in header:
+            global_headers.append("SL.")
+        else:
+            global_headers.append(header)
+
+    log.info(f"Extracted global headers: {global_headers}")
+    return global_headers
+
+
+def header_cells(page_model):
+    """Raw cells of the first row of the first table, or None if the page has no table"""
+    tables = page_model["tables"]
+    if tables and tables[0]["rows"]:
+        return tables[0]["rows"][0]["cells"]
+    return None
+
+
+def find_page_tables(page, page_num, template=None):
+    """Find the page's tables, from the table template when the page fits it"""
+    if template is not None:
+        import table_template
+
+        found_tables = table_template.find_tables(page, template)
+        if found_tables is not None:
+            return found_tables
+        run_stats.count("template_fallbacks")
+        log.debug("  Page %s does not fit the table template, detecting tables", page_num)
+    return page.find_tables()
+
+
+def parse_page(page, page_num, template=None, use_text=False):
+    """Parse a page into its page model: text lines plus each table's rows with their geometry
+
+    With `use_text`, the rows are read from the text layer when the page
+    allows it (see text_rows.py), and its tables are extracted otherwise.
+    """
+    # Per-page lines use lazy %-formatting: they cost nothing unless --verbose
+    log.debug("Processing page %s...", page_num)
+    run_stats.count("pages_extracted")
+
+    # Parse the page layout up front so it is not billed to whichever step touches it first
+    with run_stats.timer("parse_page"):
+        page.objects
+
+    if use_text:
+        import text_rows
+        with run_stats.timer("text_rows"):
+            page_model = text_rows.parse_page(page, page_num)
+        if page_model is not None:
+            run_stats.count("text_pages")
+            run_stats.count("tables", len(page_model["tables"]))
+            return page_model
+        run_stats.count("text_fallbacks")
+        log.debug("  Page %s does not read as text rows, extracting tables", page_num)
+
+    # All text lines of the page in reading order, for Line Number
+    with run_stats.timer("extract_text"):
+        lines = (page.extract_text() or "").splitlines()
+
+    tables = []
+    with run_stats.timer("extract_tables"):
+        for found_table in find_page_tables(page, page_num, template):
+            # extract() yields one list of cells per entry of found_table.rows
+            table_rows = found_table.rows
+            tables.append({
+                "bbox": list(found_table.bbox),
+                "rows": [{"cells": cells, "bbox": list(table_rows[row_idx].bbox) if row_idx < len(table_rows) else None}
+                         for row_idx, cells in enumerate(found_table.extract())]
+            })
+
+    if tables:
+        run_stats.count("tables", len(tables))
+        log.debug("  Found %s tables on page %s", len(tables), page_num)
+    else:
+        log.warning(f"  No tables found on page {page_num}")
+
+    return {"page": page_num, "lines": lines, "tables": tables}
+
+
+def parse_pages(pdf_path, page_numbers, template=None, use_text=False):
+    """Worker entry point: open the PDF and parse the given pages"""
+    import pdfplumber
+
+    page_models = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_numbers:
+            page = pdf.pages[page_num - 1]
+            page_models.append(parse_page(page, page_num, template, use_text))
+            # Release the page's parsed layout before moving to the next one
+            page.close()
+    return page_models
+
+
+def row_bounding_box(table, row_idx, counts):
+    """Get a row's (x0, y0, x1, y1, exact) box from its table cells, estimating it if the row has no geometry"""
+    row_bbox = table["rows"][row_idx]["bbox"]
+    if row_bbox:
+        x0, top, x1, bottom = row_bbox
+        return (float(x0), float(top), float(x1), float(bottom), True)
+
+    # No cell geometry for this row - spread the table's height evenly over its rows
+    counts["bbox_fallbacks"] = counts.get("bbox_fallbacks", 0) + 1
+    x0, top, x1, bottom = table["bbox"]
+    row_height = (bottom - top) / max(len(table["rows"]), 1)
+    return (float(x0), float(top + row_idx * row_height), float(x1), float(top + (row_idx + 1) * row_height), False)
+
+
+def map_page(page_model, profile, global_headers, counts):
+    """Turn a page model into the profile's ExamRows, adding row tallies to `counts`"""
+    entries = []
+    page_num = page_model["page"]
+    date_field = profile["date_field"]
+
+    def skip(reason):
+        counts[f"rows_skipped_{reason}"] = counts.get(f"rows_skipped_{reason}", 0) + 1
+
+    for table in page_model["tables"]:
+        table_rows = [row["cells"] for row in table["rows"]]
+        if not table_rows:
+            continue
+
+        for row_idx, row in enumerate(table_rows):
+            if profile["header_rows"] == "every_table":
+                # Skip header row on every page
+                if row == table_rows[0]:
+                    skip("header")
+                    continue
+            elif row_idx == 0 and page_num == 1:
+                skip("header")
+                continue
+
+            if is_empty_row(row):
+                skip("empty")
+                continue
+            if profile["header_rows"] == "every_table" and is_header_row(row, global_headers):
+                skip("header")
+                continue
+
+            entry = {}
+            for i, cell in enumerate(row):
+                if i < len(global_headers) and cell and global_headers[i]:
+                    value = clean_text(cell)
+                    if value:
+                        entry[global_headers[i]] = value
+
+            if profile["row_details"]:
+                # Build the full row text as it appears in the PDF (concatenated, space-separated)
+                entry["RowText"] = ' '.join([clean_text(str(cell)) for cell in row if cell])
+                # Take the bounding box straight from the table row's cells
+                entry["BoundingBox"] = row_bounding_box(table, row_idx, counts)
+
+            # Standardize date and time fields
+            if date_field in entry:
+                entry[date_field] = standardize_date(entry[date_field])
+            if "Start Time" in entry:
+                entry["Start Time"] = standardize_time(entry["Start Time"])
+            if "End Time" in entry:
+                entry["End Time"] = standardize_time(entry["End Time"])
+
+            if profile["row_details"]:
+                if "Section" in entry:
+                    entry["Section"] = str(entry["Section"])
+
+                # Find the first matching line in the PDF text for this entry
+                line_number_in_pdf = -1
+                if entry.get("Course") and entry.get("Section"):
+                    for idx, line in enumerate(page_model["lines"], 1):
+                        if entry["Course"] in line and entry["Section"] in line:
+                            line_number_in_pdf = idx
+                            break
+
+                entry["Page Number"] = page_num
+                entry["Line Number"] = line_number_in_pdf
+
+            if is_valid_entry(entry, profile):
+                entries.append(ExamRow(entry))
+                counts["rows_kept"] = counts.get("rows_kept", 0) + 1
+                log.debug("    Added entry: Course=%s, Section=%s, Page=%s",
+                          entry.get('Course'), entry.get('Section'), page_num)
+            else:
+                skip("invalid")
+                log.debug("    Skipping invalid entry, missing: %s",
+                          [field for field in ["Course", "Section", date_field] if not entry.get(field)])
+
+    return entries
+
+
+def iter_profile_entries(pdf, pdf_path, profile_names, template=None, workers=1, cache=None, counts=None,
+                         page_numbers=None, use_text=False):
+    """Yield (page_num, {profile name: entries}) in page order, parsing every page once
+
+    The column headers come from the first row of page 1's first table, so
+    `page_numbers` (to only map some pages) should include page 1. Row tallies
+    for each profile are added to counts[profile name].
+    """
+    if counts is None:
+        counts = {}
+    # The flag is only passed when set, so pages extracted as tables keep their cache keys
+    page_args = (template, True) if use_text else (template,)
+    page_models = iter_page_entries(pdf, pdf_path, page_args, parse_page, parse_pages,
+                                    workers=workers, cache=cache, cache_salt=(ENGINE_VERSION,),
+                                    page_numbers=page_numbers)
+
+    headers = None
+    for page_num, page_model in page_models:
+        if headers is None:
+            cells = header_cells(page_model) if page_num == 1 else None
+            headers = {name: normalize_headers(cells, PROFILES[name]) for name in profile_names}
+
+        yield page_num, {name: map_page(page_model, PROFILES[name], headers[name], counts.setdefault(name, {}))
+                         for name in profile_names}
+
+
+def build_metadata(pdf_path, total_entries, profile, run=None):
+    """Metadata block describing a conversion run and its fields"""
+    metadata = {
+        "source": pdf_path,
+        "generated_at": datetime.now().isoformat(),
+        "total_entries": total_entries,
+        "fields_description": dict(profile["fields_description"])
+    }
+    if run is not None:
+        metadata["run"] = run
+    return metadata
+
+
+def convert(pdf_path, outputs, workers=1, use_cache=True,
+            cache_path=DEFAULT_CACHE_PATH, cache_size_mb=DEFAULT_CACHE_SIZE_MB,
+            use_template=False, template_path=None, output_format='json', use_text=False):
+    """Convert a schedule PDF into one output per profile in a single pass
+
+    `outputs` maps profile names to output paths, e.g. {"final": "exam_data.json"}.
+    Returns the number of entries written for each profile.
+    """
+    import pdfplumber
+    import table_template
+
+    run_stats.start_run()
+    log.info(f"Processing {pdf_path}...")
+
+    workers = resolve_workers(workers)
+    profile_names = list(outputs)
+    all_entries = {name: [] for name in profile_names}
+    totals = {name: 0 for name in profile_names}
+    counts = {}
+
+    # Pages whose content hash is already cached are not re-parsed
+    cache = PageCache(cache_path, cache_size_mb) if use_cache else None
+
+    with pdfplumber.open(pdf_path) as pdf, contextlib.ExitStack() as streams:
+        log.info(f"PDF contains {len(pdf.pages)} pages")
+        run_stats.count("pages", len(pdf.pages))
+
+        # Reuse the first page's column grid on every page instead of re-detecting tables
+        template = None
+        if use_template or template_path:
+            template = table_template.resolve_template(pdf, template_path)
+
+        if output_format == 'ndjson':
+            # Stream rows to disk page by page instead of holding the whole schedule
+            files = {name: streams.enter_context(open(path, 'w', encoding='utf-8'))
+                     for name, path in outputs.items()}
+
+        for page_num, page_entries in iter_profile_entries(pdf, pdf_path, profile_names, template,
+                                                           workers, cache, counts, use_text=use_text):
+            for name, entries in page_entries.items():
+                if output_format == 'ndjson':
+                    ndjson_stream.write_rows(files[name], (entry.as_dict() for entry in entries))
+                else:
+                    # Merge in page order so SL. ordering matches the PDF
+                    all_entries[name].extend(entries)
+                totals[name] += len(entries)
+
+    if cache is not None:
+        cache.close()
+
+    for name, json_path in outputs.items():
+        profile = PROFILES[name]
+        log.info(f"Total valid entries extracted{' for ' + name if len(outputs) > 1 else ''}: {totals[name]}")
+
+        # Counters and stage timings of this run, kept with the output for later comparison
+        run = run_stats.stats.summary(workers=workers, cache=cache is not None, template=template is not None,
+                                      text_rows=use_text)
+        run["counters"] = dict(sorted({**run["counters"], **counts.get(name, {})}.items()))
+        run_stats.log_summary(run)
+        metadata = build_metadata(pdf_path, totals[name], profile, run)
+
+        if output_format == 'ndjson':
+            ndjson_stream.write_metadata(json_path, metadata)
+            log.info(f"Successfully streamed {totals[name]} entries to {json_path} "
+                     f"(metadata in {ndjson_stream.metadata_path(json_path)})")
+            continue
+
+        # Write the data to a JSON file with error handling; rows become dicts one at a time
+        try:
+            with atomic_write(json_path) as f:
+                with run_stats.timer("serialize"):
+                    ndjson_stream.write_json(f, metadata, (entry.as_dict() for entry in all_entries[name]))
+            log.info(f"Successfully wrote {totals[name]} entries to {json_path}")
+        except Exception as e:
+            log.error(f"Error writing to {json_path}: {e}")
+            raise  # Re-raise the exception after logging
+
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert a schedule PDF to one JSON file per exam type in a single pass')
+    parser.add_argument('pdf_path', help='Input schedule PDF (e.g., examData.pdf)')
+    for name, profile in PROFILES.items():
+        parser.add_argument(f'--{name}', metavar='JSON_PATH', help=f'Write {profile["date_field"]} rows to JSON_PATH')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes for page extraction (0 = one per CPU core, default: 1)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-extract every page, ignoring the page cache')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Page cache file (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f'Page cache size cap in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--template', action='store_true',
+                        help='Learn the table grid from the first page and reuse it on every page')
+    parser.add_argument('--template-file', help='Table template to load, or to save after learning it (implies --template)')
+    parser.add_argument('--text-rows', action='store_true',
+                        help='Read rows from the text layer, extracting tables only on pages that do not fit the row grammar')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='json writes one JSON file per profile; ndjson streams rows with a .meta.json sidecar')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    outputs = {name: getattr(args, name) for name in PROFILES if getattr(args, name)}
+    if not outputs:
+        parser.error(f"give at least one output: {', '.join('--' + name for name in PROFILES)}")
+
+    run_stats.configure_logging(args.quiet, args.verbose)
+    with run_stats.profiled(args.profile, args.profiler):
+        convert(args.pdf_path, outputs, workers=args.workers, use_cache=not args.no_cache,
+                cache_path=args.cache, cache_size_mb=args.cache_size,
+                use_template=args.template, template_path=args.template_file, output_format=args.format,
+                use_text=args.text_rows)
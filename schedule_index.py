@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+schedule_index.py
+
+Build the compact course/section lookup index that sits next to
+`exam_data.json` (`exam_data.json` -> `exam_data.index.json`).
+
+The index holds the run metadata, the sorted course list for autocomplete
+and, for every course and section, the offsets of its rows in the `exams`
+array. It records the SHA-256 of the data file it was built from, so the
+front end can fetch the small index first and only trust the offsets when
+the data file it later loads has the same hash.
+
+Usage:
+    python schedule_index.py exam_data.json
+    python schedule_index.py exam_data.json --output path/to/index.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+
+import run_stats
+from atomic_file import atomic_write
+
+log = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# The same rows the front end keeps: course, section, a date and both times
+DATE_FIELDS = ("Final Date", "Mid Date")
+
+
+def index_path_for(json_path):
+    """Default index location for a data file"""
+    return os.path.splitext(json_path)[0] + '.index.json'
+
+
+def content_hash(raw):
+    """SHA-256 of the data file bytes, in the form stored in the index"""
+    return 'sha256:' + hashlib.sha256(raw).hexdigest()
+
+
+def is_indexable(exam):
+    """Check if a row has everything the front end needs to show it"""
+    return bool(exam.get("Course") and exam.get("Section")
+                and any(exam.get(field) for field in DATE_FIELDS)
+                and exam.get("Start Time") and exam.get("End Time"))
+
+
+def build_index(data, raw, data_file):
+    """Build the index for parsed `data` whose file bytes are `raw`"""
+    sections = {}
+    for offset, exam in enumerate(data.get("exams") or []):
+        if not is_indexable(exam):
+            continue
+        course_sections = sections.setdefault(exam["Course"], {})
+        course_sections.setdefault(str(exam["Section"]), []).append(offset)
+
+    metadata = {key: value for key, value in (data.get("metadata") or {}).items()
+                if key != "fields_description"}
+
+    return {
+        "version": INDEX_VERSION,
+        "data_file": data_file,
+        "data_hash": content_hash(raw),
+        "metadata": metadata,
+        "courses": sorted(sections),
+        "sections": sections
+    }
+
+
+def write_index(json_path, index_path=None):
+    """Build the index for the data file at `json_path` and write it next to it"""
+    index_path = index_path or index_path_for(json_path)
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+
+    index = build_index(json.loads(raw), raw, os.path.basename(json_path))
+    with atomic_write(index_path) as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    log.info(f"Wrote index for {len(index['courses'])} courses to {index_path}")
+    return index
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Build the course/section lookup index for exam_data.json')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--output', '-o', help='Index file to write (default: <data file>.index.json)')
+    args = parser.parse_args()
+
+    write_index(args.json_path, args.output)
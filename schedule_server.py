@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+"""
+schedule_server.py
+
+Small local HTTP API over a converted schedule, for serving the site's
+data from one process instead of a chain of static files.
+
+The data file is loaded once into memory together with its course/section
+index (the same one `schedule_index.py` writes) and its `set_title.py`
+naming; every response is built once per loaded version and served from
+memory. Responses carry a strong ETag, so a client that sends it back in
+`If-None-Match` gets an empty `304 Not Modified`, and are gzipped for
+clients that accept it. The server polls the data file, its title sidecar
+and the status files and swaps in a new version as soon as the converter
+writes one; requests keep being answered from the previous version until
+the new one is ready, and a broken file leaves the previous version up.
+
+Usage:
+    python schedule_server.py exam_data.json
+    python schedule_server.py exam_data.json --port 8080 --exam-status exam_status.json --semester-status status.json
+
+Endpoints (GET and HEAD):
+    /courses                          sorted course list with the sections of each course
+    /exams?course=CSE220[&section=3]  rows of a course, or of one of its sections
+    /status                           the schedule's metadata, hash and exam type, plus the status files
+
+Only the standard library is needed; it listens on localhost by default.
+"""
+import argparse
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import parse_qs, urlsplit
+
+import run_stats
+import schedule_index
+import set_title
+from schedule_store import exam_type_of
+from schedule_watch import DEFAULT_POLL_INTERVAL, file_state
+
+log = logging.getLogger(__name__)
+
+API_VERSION = 1
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+# Smaller bodies are sent as they are; gzip would barely shrink them
+GZIP_MIN_SIZE = 512
+GZIP_LEVEL = 6
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADERS = 100
+MAX_BODY = 64 * 1024
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class Response:
+    """A JSON body with its strong ETag, and a gzip copy made on first use"""
+
+    def __init__(self, status, payload):
+        self.status = status
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Each encoding of a body is its own representation and needs its own strong ETag
+        self.gzip_etag = f'"{digest}-gzip"'
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            # mtime=0 keeps the bytes the same for the same body
+            self._gzipped = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        return self._gzipped
+
+
+def error_response(status, message):
+    return Response(status, {"error": message})
+
+
+def semester_key(semester):
+    """Semester label as the site keys it ("Fall-2025" -> "fall2025")"""
+    return re.sub(r'[^a-z0-9]', '', str(semester or '').lower())
+
+
+def read_status_file(path):
+    """Parsed JSON of a status file, or None if it is missing or broken"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring status file {path}: {e}")
+        return None
+
+
+class Schedule:
+    """One loaded version of the data file, with its responses prebuilt"""
+
+    def __init__(self, json_path, status_paths):
+        with open(json_path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        index = schedule_index.build_index(data, raw, os.path.basename(json_path))
+
+        # The title sidecar is merged over the metadata as a whole, as the site does
+        title = read_status_file(set_title.title_path_for(json_path))
+        metadata = {**index["metadata"], **title} if isinstance(title, dict) else index["metadata"]
+
+        self.data_hash = index["data_hash"]
+        self.exams = data.get("exams") or []
+        self.sections = index["sections"]
+        self.course_names = {course.upper(): course for course in index["courses"]}
+        self.total_entries = sum(len(offsets) for sections in self.sections.values() for offsets in sections.values())
+        self.exam_responses = {}
+
+        self.courses = Response(200, {
+            "data_hash": self.data_hash,
+            "courses": index["courses"],
+            "sections": {course: list(sections) for course, sections in self.sections.items()}
+        })
+        self.status = Response(200, {
+            "version": API_VERSION,
+            "schedule": {
+                "data_file": index["data_file"],
+                "data_hash": self.data_hash,
+                "metadata": metadata,
+                "exam_type": exam_type_of(data, metadata),
+                "semester_key": semester_key(metadata.get("semester")),
+                "courses": len(index["courses"]),
+                "total_entries": self.total_entries
+            },
+            **{name: read_status_file(path) if path else None for name, path in status_paths.items()}
+        })
+
+    def exams_response(self, course, section=None):
+        """Rows of a course, or of one section of it; built on first request"""
+        key = (course.strip().upper(), section.strip() if section else None)
+        response = self.exam_responses.get(key)
+        if response is not None:
+            return response
+
+        name = self.course_names.get(key[0])
+        if name is None:
+            return error_response(404, f"Unknown course: {course}")
+        sections = self.sections[name]
+        if key[1] is None:
+            offsets = sorted(offset for section_offsets in sections.values() for offset in section_offsets)
+        elif key[1] in sections:
+            offsets = sections[key[1]]
+        else:
+            return error_response(404, f"Unknown section of {name}: {section}")
+
+        response = Response(200, {
+            "data_hash": self.data_hash,
+            "course": name,
+            "section": key[1],
+            "exams": [self.exams[offset] for offset in offsets]
+        })
+        self.exam_responses[key] = response
+        return response
+
+
+def accepts_gzip(accept_encoding):
+    """Check if an Accept-Encoding header allows gzip"""
+    for coding in accept_encoding.lower().split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip() in ('gzip', '*'):
+            quality = params.strip()
+            return not re.fullmatch(r'q\s*=\s*0(\.0*)?', quality)
+    return False
+
+
+def etag_matches(if_none_match, response):
+    """Check if an If-None-Match header names either representation of a response (weak comparison)"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or response.etag in tags or response.gzip_etag in tags
+
+
+class ScheduleServer:
+    """Serves a data file and reloads it whenever it or one of its companion files changes"""
+
+    def __init__(self, json_path, status_paths=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.json_path = json_path
+        self.status_paths = status_paths or {"semester_status": None, "exam_status": None}
+        self.poll_interval = poll_interval
+        self.watched = [json_path, set_title.title_path_for(json_path), *filter(None, self.status_paths.values())]
+        # States are taken before loading, so a write during the load is picked up by the next poll
+        self.states = [file_state(path) for path in self.watched]
+        self.schedule = Schedule(json_path, self.status_paths)
+
+    async def reload_forever(self):
+        """Poll the watched files and swap in a new Schedule when one of them changes"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            states = [file_state(path) for path in self.watched]
+            if states == self.states:
+                continue
+            self.states = states
+            try:
+                # Built off the event loop, so requests are answered from the current version meanwhile
+                schedule = await asyncio.to_thread(Schedule, self.json_path, self.status_paths)
+            except Exception:
+                log.exception(f"Reloading {self.json_path} failed, still serving {self.schedule.data_hash[:19]}")
+                continue
+            if schedule.data_hash != self.schedule.data_hash or schedule.status.etag != self.schedule.status.etag:
+                log.info(f"Reloaded {self.json_path} ({schedule.data_hash[:19]}, {schedule.total_entries} entries)")
+            self.schedule = schedule
+
+    def respond(self, method, target, headers):
+        """(status, headers, body) for one request"""
+        if method not in ('GET', 'HEAD'):
+            response = error_response(405, f"{method} is not supported")
+        else:
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            schedule = self.schedule
+            if url.path == '/courses':
+                response = schedule.courses
+            elif url.path == '/status':
+                response = schedule.status
+            elif url.path == '/exams':
+                course = (query.get('course') or [''])[0]
+                section = (query.get('section') or [None])[0]
+                response = (schedule.exams_response(course, section) if course.strip()
+                            else error_response(400, "The course parameter is required"))
+            else:
+                response = error_response(404, f"No such endpoint: {url.path}")
+
+        response_headers = [('Date', formatdate(usegmt=True)),
+                            ('Access-Control-Allow-Origin', '*'),
+                            ('Access-Control-Expose-Headers', 'ETag'),
+                            ('Vary', 'Accept-Encoding')]
+        if response.status == 405:
+            response_headers.append(('Allow', 'GET, HEAD'))
+
+        use_gzip = len(response.body) >= GZIP_MIN_SIZE and accepts_gzip(headers.get('accept-encoding', ''))
+        if response.status == 200:
+            # Cached by the client, but checked with the ETag on every use
+            response_headers += [('ETag', response.gzip_etag if use_gzip else response.etag),
+                                 ('Cache-Control', 'no-cache')]
+            if etag_matches(headers.get('if-none-match'), response):
+                return 304, response_headers, b''
+
+        body = response.gzipped() if use_gzip else response.body
+        response_headers.append(('Content-Type', 'application/json; charset=utf-8'))
+        if use_gzip:
+            response_headers.append(('Content-Encoding', 'gzip'))
+        response_headers.append(('Content-Length', str(len(body))))
+        return response.status, response_headers, b'' if method == 'HEAD' else body
+
+    async def handle(self, reader, writer):
+        """Answer the requests of one connection until it is closed or idle"""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                    break
+                method, target, version = parts
+
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                    if len(headers) > MAX_HEADERS:
+                        return
+                # A body is never used, but has to be read past to reach the next request
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    return
+                if length:
+                    await reader.readexactly(length)
+
+                status, response_headers, body = self.respond(method, target, headers)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                response_headers.append(('Connection', 'keep-alive' if keep_alive else 'close'))
+
+                head = f"HTTP/1.1 {status} {REASONS[status]}\r\n" + ''.join(
+                    f"{name}: {value}\r\n" for name, value in response_headers) + "\r\n"
+                writer.write(head.encode('latin-1') + body)
+                await writer.drain()
+                log.debug("%s %s %d %d bytes", method, target, status, len(body))
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Listen until cancelled"""
+        server = await asyncio.start_server(self.handle, host, port)
+        reloader = asyncio.create_task(self.reload_forever())
+        address = server.sockets[0].getsockname()
+        log.info(f"Serving {self.schedule.total_entries} entries of {self.json_path} on http://{address[0]}:{address[1]} "
+                 f"(reloading on change, polled every {self.poll_interval:g}s), Ctrl+C to stop")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reloader.cancel()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a converted schedule over a small local HTTP API')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', '-p', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--semester-status', metavar='PATH', help='Semester status file to include in /status')
+    parser.add_argument('--exam-status', metavar='PATH', help='Exam confirmation status file to include in /status')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between checks of the data file for changes (default: {DEFAULT_POLL_INTERVAL:g})')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    run_stats.configure_logging(args.quiet, args.verbose)
+    status_paths = {"semester_status": args.semester_status, "exam_status": args.exam_status}
+    with run_stats.profiled(args.profile, args.profiler):
+        try:
+            asyncio.run(ScheduleServer(args.json_path, status_paths, args.poll_interval).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            log.info("Stopped")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+schedule_shards.py
+
+Split `exam_data.json` into small per-course shards so the site only
+downloads the rows a student actually looks up.
+
+Rows are grouped by course-code prefix (`ACT201` -> `ACT`) or, with
+`--by course`, by course. Each shard is written as
+`exam_shards/<bucket>.<hash>.json`, where the hash is taken from the
+shard's content, so hosts can cache shards forever. Rows are copied
+unchanged, `Page Number` and `BoundingBox` included, so the cross-check
+viewer keeps working. `exam_shards/manifest.json` lists the courses,
+their sections and the shard that holds each course, along with the
+hash of the data file the shards were cut from (the index's `data_hash`),
+so readers can tell when the shards are stale.
+
+Usage:
+    python schedule_shards.py exam_data.json
+    python schedule_shards.py exam_data.json --by course --output-dir exam_shards
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+
+import run_stats
+from atomic_file import atomic_write, write_bytes
+from schedule_index import content_hash, is_indexable
+
+log = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_SHARD_DIR = 'exam_shards'
+
+# Shard files this module writes; anything else in the directory is left alone
+SHARD_FILE_RE = re.compile(r'^[A-Za-z0-9_]+\.[0-9a-f]{12}\.json$')
+
+
+def shard_dir_for(json_path):
+    """Default shard directory for a data file"""
+    return os.path.join(os.path.dirname(json_path), DEFAULT_SHARD_DIR)
+
+
+def shard_bucket(course, by='prefix'):
+    """Name of the shard a course goes into"""
+    if by == 'course':
+        return re.sub(r'[^A-Za-z0-9]', '_', course) or '_'
+    match = re.match(r'[A-Za-z]+', course)
+    return match.group(0).upper() if match else '_'
+
+
+def read_manifest(output_dir):
+    """Read the manifest in a shard directory, or None if there is none"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_shards(json_path, output_dir=None, by=None):
+    """Write one shard per bucket plus the manifest; returns the manifest
+
+    Without `by`, an existing manifest's bucketing is kept (prefix otherwise).
+    """
+    output_dir = output_dir or shard_dir_for(json_path)
+    os.makedirs(output_dir, exist_ok=True)
+    if by is None:
+        by = (read_manifest(output_dir) or {}).get('by', 'prefix')
+
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    exams = json.loads(raw).get('exams') or []
+
+    buckets = {}
+    sections = {}
+    for exam in exams:
+        # Same rows the index and the front end keep
+        if not is_indexable(exam):
+            continue
+        buckets.setdefault(shard_bucket(exam['Course'], by), []).append(exam)
+        course_sections = sections.setdefault(exam['Course'], [])
+        if str(exam['Section']) not in course_sections:
+            course_sections.append(str(exam['Section']))
+
+    shards = {}
+    for bucket, rows in sorted(buckets.items()):
+        payload = json.dumps({"bucket": bucket, "exams": rows}, ensure_ascii=False, separators=(',', ':'))
+        payload = payload.encode('utf-8')
+        name = f"{bucket}.{hashlib.sha256(payload).hexdigest()[:12]}.json"
+        write_bytes(os.path.join(output_dir, name), payload)
+        shards[bucket] = {
+            "file": name,
+            "rows": len(rows),
+            "bytes": len(payload),
+            "courses": sorted({exam['Course'] for exam in rows})
+        }
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "by": by,
+        "data_hash": content_hash(raw),
+        "total_entries": sum(shard["rows"] for shard in shards.values()),
+        "courses": sorted(sections),
+        "sections": sections,
+        "shards": shards
+    }
+    # Written after every shard it names, so a published manifest never points at a missing file
+    with atomic_write(os.path.join(output_dir, MANIFEST_NAME)) as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+
+    # Drop shards from earlier runs that the new manifest no longer points to
+    current = {shard["file"] for shard in shards.values()}
+    for name in os.listdir(output_dir):
+        if SHARD_FILE_RE.match(name) and name not in current:
+            os.remove(os.path.join(output_dir, name))
+
+    log.info(f"Wrote {len(shards)} shards for {len(sections)} courses to {output_dir}")
+    return manifest
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Split exam_data.json into per-course shards with a manifest')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--output-dir', '-o', help=f'Shard directory (default: {DEFAULT_SHARD_DIR}/ next to the data file)')
+    parser.add_argument('--by', choices=['prefix', 'course'],
+                        help='One shard per course-code prefix (ACT, CSE, ...) or per course (default: keep the current layout, else prefix)')
+    args = parser.parse_args()
+
+    write_shards(args.json_path, args.output_dir, args.by)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+schedule_slots.py
+
+Build the exam time-slot index that sits next to `exam_data.json`
+(`exam_data.json` -> `exam_data.slots.json`), and check a selection of
+course sections for clashes with it.
+
+A slot is a date with a start and end time. The index lists every slot
+with the course sections that sit in it, plus, for every slot, the other
+slots on the same date whose times overlap it. Two sections clash when
+they share a slot or sit in overlapping slots, so checking a selection
+takes a few dictionary lookups per pair of sections instead of a pass
+over the rows. Like the lookup index, the file records the SHA-256 of
+the data file it was built from.
+
+Usage:
+    python schedule_slots.py exam_data.json
+    python schedule_slots.py exam_data.json --check CSE220:3 MAT120:5 PHY111:2
+
+With --check, the clashes of the given sections are printed and the exit
+status is 1 if there are any.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+
+import run_stats
+from atomic_file import atomic_write
+from schedule_index import DATE_FIELDS, content_hash, is_indexable
+
+log = logging.getLogger(__name__)
+
+SLOTS_VERSION = 1
+
+
+def slots_path_for(json_path):
+    """Default slot index location for a data file"""
+    return os.path.splitext(json_path)[0] + '.slots.json'
+
+
+def slot_of(exam):
+    """(date, start, end) of a row"""
+    date = next(exam[field] for field in DATE_FIELDS if exam.get(field))
+    return (date, exam["Start Time"], exam["End Time"])
+
+
+def minutes(value):
+    """Minutes since midnight of an HH:MM time, or None if it is not one"""
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})', str(value).strip())
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+
+def overlaps(slot, other):
+    """Check if two different slots are on the same date with overlapping times"""
+    if slot[0] != other[0]:
+        return False
+    times = [minutes(value) for value in (slot[1], slot[2], other[1], other[2])]
+    # Times that cannot be compared only clash when they are identical, i.e. the same slot
+    if None in times:
+        return False
+    start, end, other_start, other_end = times
+    return start < other_end and other_start < end
+
+
+def build_slots(data, raw, data_file):
+    """Build the slot index for parsed `data` whose file bytes are `raw`"""
+    members = {}
+    for exam in data.get("exams") or []:
+        if not is_indexable(exam):
+            continue
+        sections = members.setdefault(slot_of(exam), {}).setdefault(exam["Course"], [])
+        if str(exam["Section"]) not in sections:
+            sections.append(str(exam["Section"]))
+
+    slots = sorted(members)
+    by_date = {}
+    for slot_id, slot in enumerate(slots):
+        by_date.setdefault(slot[0], []).append(slot_id)
+
+    # Only slots on the same date can overlap, so each date's few slots are compared among themselves
+    clashes = {}
+    for slot_ids in by_date.values():
+        for slot_id in slot_ids:
+            overlapping = [other for other in slot_ids if other != slot_id and overlaps(slots[slot_id], slots[other])]
+            if overlapping:
+                clashes[str(slot_id)] = overlapping
+
+    return {
+        "version": SLOTS_VERSION,
+        "data_file": data_file,
+        "data_hash": content_hash(raw),
+        "slots": [{"date": date, "start": start, "end": end, "sections": members[(date, start, end)]}
+                  for date, start, end in slots],
+        "clashes": clashes
+    }
+
+
+def slot_lookup(slots_index):
+    """{(COURSE, section): [slot ids]} for a slot index"""
+    lookup = {}
+    for slot_id, slot in enumerate(slots_index["slots"]):
+        for course, sections in slot["sections"].items():
+            for section in sections:
+                lookup.setdefault((course.upper(), section), []).append(slot_id)
+    return lookup
+
+
+def find_clashes(slots_index, selection, lookup=None):
+    """Clashing pairs among (course, section) pairs, as dicts naming both sections and their slots"""
+    lookup = lookup if lookup is not None else slot_lookup(slots_index)
+    clash_sets = {int(slot_id): set(others) for slot_id, others in slots_index["clashes"].items()}
+    chosen = list(dict.fromkeys((str(course).strip().upper(), str(section).strip()) for course, section in selection))
+
+    found = []
+    for i, first in enumerate(chosen):
+        for second in chosen[i + 1:]:
+            for slot_id in lookup.get(first, []):
+                for other_id in lookup.get(second, []):
+                    if slot_id == other_id or other_id in clash_sets.get(slot_id, ()):
+                        slot, other = slots_index["slots"][slot_id], slots_index["slots"][other_id]
+                        found.append({
+                            "sections": [list(first), list(second)],
+                            "date": slot["date"],
+                            "times": [f"{slot['start']}-{slot['end']}", f"{other['start']}-{other['end']}"]
+                        })
+    return found
+
+
+def write_slots(json_path, slots_path=None):
+    """Build the slot index for the data file at `json_path` and write it next to it"""
+    slots_path = slots_path or slots_path_for(json_path)
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+
+    slots_index = build_slots(json.loads(raw), raw, os.path.basename(json_path))
+    with atomic_write(slots_path) as f:
+        json.dump(slots_index, f, ensure_ascii=False, separators=(',', ':'))
+
+    log.info(f"Wrote {len(slots_index['slots'])} exam slots ({len(slots_index['clashes'])} overlapping others) to {slots_path}")
+    return slots_index
+
+
+def parse_selection(values):
+    """[(course, section), ...] from COURSE:SECTION arguments"""
+    selection = []
+    for value in values:
+        course, separator, section = value.partition(':')
+        if not separator or not course.strip() or not section.strip():
+            raise ValueError(f"expected COURSE:SECTION, got {value!r}")
+        selection.append((course, section))
+    return selection
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Build the exam slot index for exam_data.json, or check sections for clashes')
+    parser.add_argument('json_path', nargs='?', default='exam_data.json', help='Path to exam_data.json')
+    parser.add_argument('--output', '-o', help='Slot index file to write (default: <data file>.slots.json)')
+    parser.add_argument('--check', nargs='+', metavar='COURSE:SECTION',
+                        help='Print the clashes among these sections instead of writing the index')
+    args = parser.parse_args()
+
+    if not args.check:
+        write_slots(args.json_path, args.output)
+        sys.exit(0)
+
+    try:
+        selection = parse_selection(args.check)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(args.json_path, 'rb') as f:
+        raw = f.read()
+    slots_index = build_slots(json.loads(raw), raw, os.path.basename(args.json_path))
+    lookup = slot_lookup(slots_index)
+    for course, section in selection:
+        if (course.strip().upper(), section.strip()) not in lookup:
+            log.warning(f"{course.strip().upper()} section {section.strip()} is not in {args.json_path}")
+
+    clashes = find_clashes(slots_index, selection, lookup)
+    for clash in clashes:
+        (first_course, first_section), (second_course, second_section) = clash["sections"]
+        print(f"{first_course} {first_section} ({clash['times'][0]}) clashes with "
+              f"{second_course} {second_section} ({clash['times'][1]}) on {clash['date']}")
+    print(f"{len(clashes)} clashes among {len(selection)} sections")
+    sys.exit(1 if clashes else 0)
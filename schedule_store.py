@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+"""
+schedule_store.py
+
+SQLite store that keeps every converted schedule, one per semester and
+exam type, so earlier semesters and midterm/final pairs are not lost when
+`exam_data.json` is overwritten.
+
+Each schedule is filed under the semester set with `set_title.py` and its
+exam type (`final` or `mid`, from the rows' date field). Rows keep their
+original JSON next to indexed course/section, date and room columns, so
+lookups are answered from the indexes and any stored schedule can be
+written back out as the exact `exam_data.json` it was imported from.
+
+Usage:
+    python schedule_store.py import exam_data.json
+    python schedule_store.py import old_data.json --semester Spring-2025 --exam-type mid
+    python schedule_store.py import exam_data.json --replace
+    python schedule_store.py list
+    python schedule_store.py find CSE220 [SECTION] [--semester Fall-2025] [--exam-type final]
+    python schedule_store.py find --date 2025-12-14 --room 07A-04C
+    python schedule_store.py export Fall-2025 final exam_data.json
+
+The converters import their output directly with `--store`. Importing
+rows that differ from the stored schedule of the same semester and exam
+type is refused unless `--replace` is given, so a title left over from
+last semester cannot overwrite that semester's schedule.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+import ndjson_stream
+import run_stats
+import set_title
+from atomic_file import atomic_write
+
+log = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = 'exam_schedules.sqlite'
+
+# Schema version, recorded in the database's user_version
+STORE_VERSION = 1
+
+EXAM_TYPES = ("final", "mid")
+
+DATE_FIELDS = {"Final Date": "final", "Mid Date": "mid"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    semester TEXT NOT NULL COLLATE NOCASE,
+    exam_type TEXT NOT NULL,
+    naming TEXT,
+    metadata TEXT NOT NULL,
+    total_entries INTEGER NOT NULL,
+    imported_at TEXT NOT NULL,
+    UNIQUE (semester, exam_type)
+);
+CREATE TABLE IF NOT EXISTS exams (
+    schedule_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    course TEXT,
+    section TEXT,
+    date TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    room TEXT,
+    dept TEXT,
+    row TEXT NOT NULL,
+    PRIMARY KEY (schedule_id, position)
+);
+CREATE INDEX IF NOT EXISTS exams_course_section ON exams (course, section);
+CREATE INDEX IF NOT EXISTS exams_date ON exams (date);
+CREATE INDEX IF NOT EXISTS exams_room ON exams (room);
+"""
+
+
+def exam_type_of(data, naming=None):
+    """'final' or 'mid' from the rows' date field, else from the exam name; None if neither tells"""
+    for exam in data.get("exams") or []:
+        for field, exam_type in DATE_FIELDS.items():
+            if field in exam:
+                return exam_type
+
+    exam_name = (naming or {}).get("exam_name") or (naming or {}).get("title") or ""
+    if re.search(r'final', exam_name, re.IGNORECASE):
+        return "final"
+    if re.search(r'mid', exam_name, re.IGNORECASE):
+        return "mid"
+    return None
+
+
+def exam_columns(exam):
+    """Indexed column values of a row, in the order of the exams table"""
+    date = next((exam[field] for field in DATE_FIELDS if field in exam), None)
+    section = exam.get("Section")
+    return (exam.get("Course"), str(section) if section is not None else None, date,
+            exam.get("Start Time"), exam.get("End Time"), exam.get("Room."), exam.get("Dept."))
+
+
+class StoreConflict(ValueError):
+    """A stored schedule would be replaced by one with different rows"""
+
+
+class ScheduleStore:
+    """SQLite-backed store of converted schedules, keyed by semester and exam type"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f'PRAGMA user_version = {STORE_VERSION}')
+        self.conn.commit()
+
+    def import_schedule(self, data, semester, exam_type, naming=None, replace=False):
+        """Store parsed exam data under (semester, exam_type); returns its id
+
+        A stored schedule with the same rows is refreshed. One with other rows
+        is only replaced with `replace`; otherwise StoreConflict is raised.
+        """
+        exams = data.get("exams") or []
+        rows = [json.dumps(exam, ensure_ascii=False) for exam in exams]
+        # One transaction: readers see the old schedule or the new one, never a mix
+        with self.conn:
+            found = self.conn.execute('SELECT id, metadata, total_entries, imported_at FROM schedules'
+                                      ' WHERE semester = ? AND exam_type = ?', (semester, exam_type)).fetchone()
+            if found is not None:
+                stored_rows = [row for row, in self.conn.execute(
+                    'SELECT row FROM exams WHERE schedule_id = ? ORDER BY position', (found[0],))]
+                if stored_rows != rows:
+                    source = json.loads(found[1]).get("source") or "unknown source"
+                    stored = f"{semester} {exam_type} ({found[2]} entries from {source}, imported {found[3]})"
+                    if not replace:
+                        raise StoreConflict(f"{stored} holds different rows")
+                    log.warning(f"Replacing {stored}")
+                self.conn.execute('DELETE FROM exams WHERE schedule_id = ?', (found[0],))
+                self.conn.execute('DELETE FROM schedules WHERE id = ?', (found[0],))
+
+            schedule_id = self.conn.execute(
+                'INSERT INTO schedules (semester, exam_type, naming, metadata, total_entries, imported_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (semester, exam_type, json.dumps(naming, ensure_ascii=False) if naming else None,
+                 json.dumps(data.get("metadata") or {}, ensure_ascii=False), len(exams),
+                 datetime.now(timezone.utc).isoformat())
+            ).lastrowid
+            self.conn.executemany(
+                'INSERT INTO exams (schedule_id, position, course, section, date, start_time, end_time, room, dept, row)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((schedule_id, position, *exam_columns(exam), row)
+                 for position, (exam, row) in enumerate(zip(exams, rows)))
+            )
+        return schedule_id
+
+    def import_file(self, json_path, semester=None, exam_type=None, replace=False):
+        """Store a data file under its set_title.py semester and its exam type; returns the key, or None if unknown
+
+        Raises StoreConflict if that key holds different rows and `replace` is not set.
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        naming = set_title.read_title(json_path)
+        if naming:
+            # read_title stamps the time of reading; keep the stored naming as it was set
+            naming.pop("last_updated", None)
+        semester = semester or (naming or {}).get("semester")
+        exam_type = exam_type or exam_type_of(data, naming)
+        if not semester or not exam_type:
+            log.warning(f"Not storing {json_path}: no {'semester' if not semester else 'exam type'} known "
+                        f"(run set_title.py first, or import it with --semester/--exam-type)")
+            return None
+
+        try:
+            self.import_schedule(data, semester, exam_type, naming, replace)
+        except StoreConflict as e:
+            raise StoreConflict(f"Not storing {json_path}: {e}. Set the new semester with set_title.py, "
+                                f"or import it with --replace to overwrite the stored schedule") from None
+        log.info(f"Stored {len(data.get('exams') or [])} entries from {json_path} as {semester} {exam_type} in {self.path}")
+        return (semester, exam_type)
+
+    def schedules(self):
+        """(semester, exam_type, total_entries, imported_at) of every stored schedule"""
+        return self.conn.execute(
+            'SELECT semester, exam_type, total_entries, imported_at FROM schedules ORDER BY semester, exam_type'
+        ).fetchall()
+
+    def find(self, course=None, section=None, date=None, room=None, semester=None, exam_type=None):
+        """Stored rows matching every given filter, as (semester, exam_type, row dict) in schedule order"""
+        filters = [('e.course = ?', course and course.strip().upper()),
+                   ('e.section = ?', section and str(section).strip()),
+                   ('e.date = ?', date), ('e.room = ?', room),
+                   ('s.semester = ?', semester), ('s.exam_type = ?', exam_type)]
+        clauses = [clause for clause, value in filters if value]
+        query = ('SELECT s.semester, s.exam_type, e.row FROM exams e JOIN schedules s ON s.id = e.schedule_id'
+                 + (' WHERE ' + ' AND '.join(clauses) if clauses else '')
+                 + ' ORDER BY s.semester, s.exam_type, e.position')
+        return [(found_semester, found_type, json.loads(row)) for found_semester, found_type, row
+                in self.conn.execute(query, [value for clause, value in filters if value])]
+
+    def export(self, semester, exam_type, json_path):
+        """Write a stored schedule back out as `json_path` plus its naming sidecar; returns the row count"""
+        found = self.conn.execute('SELECT id, naming, metadata FROM schedules WHERE semester = ? AND exam_type = ?',
+                                  (semester, exam_type)).fetchone()
+        if found is None:
+            raise KeyError(f"No {exam_type} schedule stored for {semester}")
+        schedule_id, naming, metadata = found
+
+        rows = self.conn.execute('SELECT row FROM exams WHERE schedule_id = ? ORDER BY position', (schedule_id,))
+        with atomic_write(json_path) as f:
+            total = ndjson_stream.write_json(f, json.loads(metadata), (json.loads(row) for row, in rows))
+
+        if naming:
+            set_title.write_title(json_path, {**json.loads(naming),
+                                              "last_updated": datetime.now(timezone.utc).isoformat()})
+        elif os.path.exists(set_title.title_path_for(json_path)):
+            log.warning(f"{semester} {exam_type} has no stored title; {set_title.title_path_for(json_path)} was left as it is")
+
+        log.info(f"Wrote {total} entries of {semester} {exam_type} to {json_path}")
+        return total
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def print_rows(found):
+    """Print matching rows one per line"""
+    for semester, exam_type, exam in found:
+        date = next((exam[field] for field in DATE_FIELDS if field in exam), '')
+        print(f"{semester:<14}{exam_type:<7}{exam.get('Course', ''):<10}{exam.get('Section', ''):<10}"
+              f"{date:<12}{exam.get('Start Time', '')}-{exam.get('End Time', ''):<7}{exam.get('Room.', '')}")
+
+
+if __name__ == '__main__':
+    run_stats.configure_logging()
+    parser = argparse.ArgumentParser(description='Keep converted schedules per semester and exam type, and query them')
+    parser.add_argument('--store', '-s', default=DEFAULT_STORE_PATH, help=f'Store file (default: {DEFAULT_STORE_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='Store a converted exam_data.json')
+    import_parser.add_argument('json_path', help='Data file written by the converters')
+    import_parser.add_argument('--semester', help='Semester to file it under (default: the one set with set_title.py)')
+    import_parser.add_argument('--exam-type', choices=EXAM_TYPES, help='Exam type (default: from the rows)')
+    import_parser.add_argument('--replace', action='store_true',
+                               help='Overwrite a stored schedule of the same semester and exam type whose rows differ')
+
+    commands.add_parser('list', help='List the stored schedules')
+
+    find_parser = commands.add_parser('find', help='Look up rows by course, section, date or room')
+    find_parser.add_argument('course', nargs='?', help='Course code, e.g. CSE220')
+    find_parser.add_argument('section', nargs='?', help='Section, e.g. 3')
+    find_parser.add_argument('--date', help='Exam date (YYYY-MM-DD)')
+    find_parser.add_argument('--room', help='Room, e.g. 07A-04C')
+    find_parser.add_argument('--semester', help='Only this semester')
+    find_parser.add_argument('--exam-type', choices=EXAM_TYPES, help='Only this exam type')
+
+    export_parser = commands.add_parser('export', help='Write a stored schedule back out as exam_data.json')
+    export_parser.add_argument('semester', help='Semester, e.g. Fall-2025')
+    export_parser.add_argument('exam_type', choices=EXAM_TYPES, help='Exam type')
+    export_parser.add_argument('json_path', help='Output JSON file (e.g., exam_data.json)')
+    export_parser.add_argument('--index', action='store_true', help='Also write the lookup index, as pdf_converter.py --index does')
+
+    args = parser.parse_args()
+    with ScheduleStore(args.store) as store:
+        if args.command == 'import':
+            try:
+                store.import_file(args.json_path, args.semester, args.exam_type, args.replace)
+            except StoreConflict as e:
+                log.error(e)
+                sys.exit(1)
+        elif args.command == 'list':
+            for semester, exam_type, total, imported_at in store.schedules():
+                print(f"{semester:<14}{exam_type:<7}{total:>6} entries  imported {imported_at}")
+        elif args.command == 'find':
+            if not (args.course or args.date or args.room):
+                parser.error("give a course, --date or --room")
+            start = time.perf_counter()
+            found = store.find(args.course, args.section, args.date, args.room, args.semester, args.exam_type)
+            elapsed = (time.perf_counter() - start) * 1000
+            print_rows(found)
+            print(f"{len(found)} rows in {elapsed:.1f} ms")
+        elif args.command == 'export':
+            store.export(args.semester, args.exam_type, args.json_path)
+            # The site files built from the data file must follow it; the converter knows how to refresh them
+            from pdf_converter import refresh_site_files
+            refresh_site_files(args.json_path, write_index=args.index)
@@ -0,0 +1,82 @@
+"""
+schedule_watch.py
+
+Watch a schedule PDF and re-run a conversion whenever its content changes
+(used by `pdf_converter.py --watch`).
+
+The PDF is polled for its modification time and size. Once a change is
+seen, the watcher waits until the file has stopped changing for the
+debounce period, so a PDF that is still being copied or saved is not
+converted half-written. A conversion only runs when the content hash
+differs from the last converted version; touching the file or saving it
+unchanged does nothing. A failed conversion is logged and the previous
+output stays in place until the next change.
+
+Polling needs nothing beyond the standard library and behaves the same on
+every OS and on network drives, where inotify events are unreliable.
+"""
+import logging
+import os
+import time
+
+from schedule_index import content_hash
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 2.0
+
+
+def file_state(path):
+    """(mtime_ns, size) of a file, or None while it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes"""
+    with open(path, 'rb') as f:
+        return content_hash(f.read())
+
+
+def wait_until_settled(path, debounce=DEFAULT_DEBOUNCE, interval=DEFAULT_POLL_INTERVAL):
+    """Wait until the file exists and has not changed for `debounce` seconds; returns its state"""
+    state = file_state(path)
+    settled_since = time.monotonic()
+    while state is None or time.monotonic() - settled_since < debounce:
+        time.sleep(interval)
+        current = file_state(path)
+        if current != state:
+            state = current
+            settled_since = time.monotonic()
+    return state
+
+
+def watch(pdf_path, convert, interval=DEFAULT_POLL_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+    """Call convert() now and after every content change of `pdf_path`, until interrupted"""
+    log.info(f"Watching {pdf_path} (poll every {interval:g}s, debounce {debounce:g}s), Ctrl+C to stop")
+    last_state = None
+    last_hash = None
+    try:
+        while True:
+            if file_state(pdf_path) != last_state:
+                if file_state(pdf_path) is None:
+                    log.info(f"{pdf_path} is missing, waiting for it to reappear")
+                last_state = wait_until_settled(pdf_path, debounce, interval)
+                digest = file_hash(pdf_path)
+                if digest == last_hash:
+                    log.debug("%s was touched but its content is unchanged", pdf_path)
+                else:
+                    # Remember the hash even if the conversion fails, so a broken PDF is not retried in a loop
+                    last_hash = digest
+                    log.info(f"{pdf_path} changed ({digest[:19]}), converting")
+                    try:
+                        convert()
+                    except Exception:
+                        log.exception("Conversion failed, keeping the previous output")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        log.info("Stopped watching")
@@ -2,7 +2,7 @@
 """
 set_title.py
 
-Utility to update the exam naming metadata inside `exam_data.json`.
+Utility to update the exam naming metadata of `exam_data.json`.
 
 Title logic follows: <Exam Name> <Semester>
 
@@ -11,15 +11,69 @@ Usage examples:
     python set_title.py "Final Exam" "Summer-2025" --file path/to/exam_data.json
 
 This allows a single-place manual edit that the site will read and display.
+
+The naming lives in a small sidecar next to the data file
+(`exam_data.json` -> `exam_data.title.json`), which the site merges over
+the metadata it loads. The data file, its index, compact copy and shards
+are left alone, so setting a title never rewrites the schedule, and
+re-converting the PDF keeps the title. Older data files that carry the
+naming inline still work; the sidecar takes precedence.
 """
 import argparse
 import json
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+from atomic_file import atomic_write
+
+# Naming fields this script owns
+TITLE_FIELDS = ("exam_name", "semester", "title")
+
+
+def title_path_for(json_path):
+    """Path of the naming sidecar that goes with a data file"""
+    return os.path.splitext(json_path)[0] + '.title.json'
+
+
+def title_metadata(exam_name, semester):
+    """Naming metadata for an exam name and semester, stamped with the current time"""
+    exam_name = exam_name.strip()
+    semester = semester.strip()
+    return {
+        "exam_name": exam_name,
+        "semester": semester,
+        "title": f"{exam_name} {semester}".strip(),  # legacy compatibility / screenshot naming
+        "last_updated": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def read_title(json_path):
+    """Naming of a data file with a fresh last_updated, from its sidecar or else inline; None if it has none"""
+    title_path = Path(title_path_for(json_path))
+    try:
+        if title_path.exists():
+            metadata = json.loads(title_path.read_text(encoding='utf-8'))
+        else:
+            metadata = json.loads(Path(json_path).read_text(encoding='utf-8')).get('metadata')
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(metadata, dict) or not any(field in metadata for field in TITLE_FIELDS):
+        return None
+
+    title = {field: metadata[field] for field in TITLE_FIELDS if field in metadata}
+    title['last_updated'] = datetime.now(timezone.utc).isoformat()
+    return title
+
+
+def write_title(json_path, title):
+    """Write the naming sidecar of a data file"""
+    with atomic_write(title_path_for(json_path)) as f:
+        json.dump(title, f, indent=2, ensure_ascii=False)
+
 
 def main():
-    parser = argparse.ArgumentParser(description='Set metadata exam name + semester in exam_data.json')
+    parser = argparse.ArgumentParser(description='Set metadata exam name + semester for exam_data.json')
     parser.add_argument('exam_name', help='Exam name portion (e.g., "MidTerm Exam")')
     parser.add_argument('semester', help='Semester/term label (e.g., "Fall-2025")')
     parser.add_argument('--file', '-f', default='exam_data.json', help='Path to exam_data.json')
@@ -30,29 +84,13 @@ def main():
         print(f"Error: file not found: {path}")
         return
 
+    title = title_metadata(args.exam_name, args.semester)
     try:
-        data = json.loads(path.read_text(encoding='utf-8'))
-    except Exception as e:
-        print(f"Error reading JSON: {e}")
-        return
-
-    if 'metadata' not in data or not isinstance(data['metadata'], dict):
-        data['metadata'] = {}
-
-    exam_name = args.exam_name.strip()
-    semester = args.semester.strip()
-    combined_title = f"{exam_name} {semester}".strip()
-
-    data['metadata']['exam_name'] = exam_name
-    data['metadata']['semester'] = semester
-    data['metadata']['title'] = combined_title  # legacy compatibility / screenshot naming
-    data['metadata']['last_updated'] = datetime.now(timezone.utc).isoformat()
-
-    try:
-        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
-        print(f"Updated {path} -> '{combined_title}'")
+        write_title(str(path), title)
+        print(f"Updated {title_path_for(str(path))} -> '{title['title']}'")
     except Exception as e:
         print(f"Error writing JSON: {e}")
+        return
 
 
 if __name__ == '__main__':
@@ -0,0 +1,130 @@
+"""
+table_template.py
+
+Reuse one page's table grid on every other page of a schedule PDF.
+
+The schedule PDFs draw the same column grid on every page, but
+page.find_tables() re-detects lines and intersections from scratch each
+time. A template records the column positions learned from page 1 (or
+loaded from a saved file); on every other page the row lines are read off
+the page's merged horizontal edges and the cells are built directly,
+skipping pdfplumber's intersection search.
+
+When a page's edges do not fit the template (missing column lines, partial
+lines inside the grid, or any other ruling on the page), find_tables()
+returns None and the caller falls back to auto-detection.
+"""
+import json
+import logging
+import os
+
+from pdfplumber.table import Table, TableSettings, merge_edges
+from pdfplumber.utils import filter_edges
+
+from atomic_file import atomic_write
+
+log = logging.getLogger(__name__)
+
+# How far (in points) a page's edge may sit from the template's column line
+COLUMN_TOLERANCE = 3
+
+
+def learn_template(page):
+    """Learn the column grid from the first table pdfplumber detects on `page`"""
+    tables = page.find_tables()
+    if not tables:
+        return None
+
+    cells = tables[0].cells
+    columns = sorted({cell[0] for cell in cells} | {cell[2] for cell in cells})
+    return {"columns": columns}
+
+
+def load_template(path):
+    """Read a template saved with save_template()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_template(template, path):
+    """Write a template to a JSON file so later runs can skip learning it"""
+    with atomic_write(path) as f:
+        json.dump(template, f, indent=2)
+
+
+def resolve_template(pdf, template_path=None):
+    """Load the template from `template_path`, or learn it from page 1 (saving it if a path was given)"""
+    if template_path and os.path.exists(template_path):
+        log.info(f"Using table template from {template_path}")
+        return load_template(template_path)
+
+    template = learn_template(pdf.pages[0])
+    if template is None:
+        log.warning("Could not learn a table template from the first page!")
+        return None
+
+    log.info(f"Learned table template with {len(template['columns']) - 1} columns from the first page")
+    if template_path:
+        save_template(template, template_path)
+    return template
+
+
+def page_edges(page, settings):
+    """Merged ruling edges of a page, exactly as the default "lines" table strategy sees them"""
+    edges = (filter_edges(page.edges, "v", min_length=settings.edge_min_length_prefilter)
+             + filter_edges(page.edges, "h", min_length=settings.edge_min_length_prefilter))
+    edges = merge_edges(
+        edges,
+        snap_x_tolerance=settings.snap_x_tolerance,
+        snap_y_tolerance=settings.snap_y_tolerance,
+        join_x_tolerance=settings.join_x_tolerance,
+        join_y_tolerance=settings.join_y_tolerance,
+    )
+    return filter_edges(edges, min_length=settings.edge_min_length)
+
+
+def find_tables(page, template, edges=None):
+    """Build the page's table from the template grid, or return None if the page does not fit
+
+    `edges` are the page's merged edges, if the caller already has them.
+    """
+    settings = TableSettings.resolve(None)
+    x_tol = settings.intersection_x_tolerance
+    y_tol = settings.intersection_y_tolerance
+    if edges is None:
+        edges = page_edges(page, settings)
+    v_edges = [e for e in edges if e["orientation"] == "v"]
+    h_edges = [e for e in edges if e["orientation"] == "h"]
+
+    # Each template column must be drawn on this page as one vertical line
+    columns = []
+    for x in template["columns"]:
+        matches = [e for e in v_edges if abs(e["x0"] - x) <= COLUMN_TOLERANCE]
+        if len(matches) != 1:
+            return None
+        columns.append(matches[0])
+
+    left, right = columns[0]["x0"], columns[-1]["x0"]
+    top = max(e["top"] for e in columns)
+    bottom = min(e["bottom"] for e in columns)
+
+    # Row lines are the horizontal edges that cross every column line
+    rows = sorted(
+        (e for e in h_edges
+         if e["x0"] - x_tol <= left and e["x1"] + x_tol >= right
+         and top - y_tol <= e["top"] <= bottom + y_tol),
+        key=lambda e: e["top"]
+    )
+    if len(rows) < 2 or len({e["top"] for e in rows}) != len(rows):
+        return None
+
+    # Any other ruling (partial lines, merged cells, a second table) needs auto-detection
+    if len(rows) + len(columns) != len(edges):
+        return None
+
+    cells = [
+        (x0["x0"], y0["top"], x1["x0"], y1["top"])
+        for y0, y1 in zip(rows, rows[1:])
+        for x0, x1 in zip(columns, columns[1:])
+    ]
+    return [Table(page, cells)]
@@ -0,0 +1,40 @@
+import json
+
+import compact_json
+
+# Rows as the converters write them, with fields some rows lack
+ROWS = [
+    {"Course": "CSE220", "Section": "3", "Final Date": "2025-12-14", "Start Time": "09:00", "End Time": "11:00",
+     "Room.": "07A-04C", "Dept.": "CSE", "Page Number": 1,
+     "BoundingBox": {"x0": 10.5, "y0": 20.25, "x1": 300.0, "y1": 32.75, "exact": True}},
+    {"Course": "CSE220", "Section": "4", "Final Date": "2025-12-14", "Start Time": "09:00", "End Time": "11:00",
+     "Page Number": 1},
+    {"Course": "MAT120", "Section": "1", "Final Date": "2025-12-15", "Start Time": "14:00", "End Time": "16:00",
+     "Room.": None, "Dept.": "MNS", "Page Number": 2, "BoundingBox": None},
+]
+
+
+def round_trip(data):
+    raw = json.dumps(data).encode('utf-8')
+    return compact_json.decode(json.loads(compact_json.dumps(compact_json.encode(data, raw))))
+
+
+def test_round_trip_keeps_missing_fields_missing():
+    data = {"metadata": {"source": "examData.pdf"}, "exams": ROWS}
+    assert round_trip(data) == data
+
+
+def test_absent_lists_only_rows_without_the_field():
+    compact = compact_json.encode({"exams": ROWS}, b'')
+    assert compact["absent"] == {"Room.": [1], "Dept.": [1], "BoundingBox": [1]}
+
+
+def test_round_trip_rounds_bounding_boxes():
+    row = {"Course": "ACT201", "Section": "1", "BoundingBox": {"x0": 1.23456, "y0": 2.0, "x1": 3.0, "y1": 4.005}}
+    decoded = round_trip({"metadata": {}, "exams": [row]})["exams"][0]
+    assert decoded["BoundingBox"] == {"x0": 1.23, "y0": 2.0, "x1": 3.0, "y1": round(4.005, 2)}
+
+
+def test_round_trip_of_an_empty_schedule():
+    data = {"metadata": {}, "exams": []}
+    assert round_trip(data) == data
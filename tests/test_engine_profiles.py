@@ -0,0 +1,68 @@
+"""
+Converting the sample PDFs with each profile must give the rows the
+separate final and midterm converters gave before they shared the engine.
+
+The expected rows in tests/expected/ leave out BoundingBox, which may
+change as the box estimates improve. Regenerate them after an intended
+change to the rows with:
+
+    python tests/test_engine_profiles.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPECTED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'expected')
+
+PDFS = ('examData.pdf', 'examDataMid.pdf.bak')
+PROFILES = ('final', 'mid')
+
+
+def expected_path(profile, pdf_name):
+    return os.path.join(EXPECTED_DIR, f'{profile}_{pdf_name}.json')
+
+
+def convert_rows(profile, pdf_name, json_path):
+    """Rows of a fresh conversion, without BoundingBox"""
+    import schedule_engine
+
+    schedule_engine.convert(os.path.join(ROOT, pdf_name), {profile: str(json_path)}, use_cache=False)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        exams = json.load(f)["exams"]
+    return [{field: value for field, value in exam.items() if field != "BoundingBox"} for exam in exams]
+
+
+def write_expected(path, rows):
+    """One row per line, so changes to the expected rows read well in a diff"""
+    lines = (json.dumps(row, ensure_ascii=False, separators=(',', ':')) for row in rows)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n' + ',\n'.join(lines) + '\n]\n')
+
+
+@pytest.mark.parametrize('profile', PROFILES)
+@pytest.mark.parametrize('pdf_name', PDFS)
+def test_profile_output_matches_expected(tmp_path, profile, pdf_name):
+    if not os.path.exists(os.path.join(ROOT, pdf_name)):
+        pytest.skip(f'{pdf_name} is not in the checkout')
+    with open(expected_path(profile, pdf_name), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+
+    rows = convert_rows(profile, pdf_name, tmp_path / 'exam_data.json')
+    assert len(rows) == len(expected)
+    assert rows == expected
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    import tempfile
+
+    os.makedirs(EXPECTED_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        for pdf_name in PDFS:
+            for profile in PROFILES:
+                write_expected(expected_path(profile, pdf_name),
+                               convert_rows(profile, pdf_name, os.path.join(tmp, 'exam_data.json')))
+                print(f"Wrote {expected_path(profile, pdf_name)}")
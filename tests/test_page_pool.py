@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+import schedule_engine
+from page_pool import resolve_workers, split_pages
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_PATH = os.path.join(ROOT, 'examData.pdf')
+
+
+def test_split_pages_keeps_order_and_balance():
+    pages = list(range(1, 11))
+    ranges = split_pages(pages, 3)
+    assert ranges == [[1, 2, 3, 4], [5, 6, 7], [8, 9, 10]]
+    assert [page for pages in ranges for page in pages] == pages
+
+
+def test_split_pages_never_returns_empty_ranges():
+    assert split_pages([1, 2], 4) == [[1], [2]]
+    assert split_pages([7], 0) == [[7]]
+    assert split_pages([], 3) == []
+
+
+def test_resolve_workers():
+    assert resolve_workers(None) == 1
+    assert resolve_workers(-1) == 1
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) == (os.cpu_count() or 1)
+
+
+def convert_exams(json_path, workers):
+    schedule_engine.convert(PDF_PATH, {"final": str(json_path)}, workers=workers, use_cache=False)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)["exams"]
+
+
+@pytest.fixture(scope='module')
+def serial_exams(tmp_path_factory):
+    if not os.path.exists(PDF_PATH):
+        pytest.skip('examData.pdf is not in the checkout')
+    exams = convert_exams(tmp_path_factory.mktemp('serial') / 'exam_data.json', 1)
+    assert exams
+    return exams
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_merge_matches_serial_run(tmp_path, serial_exams, workers):
+    assert convert_exams(tmp_path / 'exam_data.json', workers) == serial_exams
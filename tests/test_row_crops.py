@@ -0,0 +1,26 @@
+import math
+
+from row_crops import crop_name
+
+
+def js_crop_name(y0):
+    """The name js/pdf-helper.js asks for: Math.floor(Math.round(y0 * 100) / 10)"""
+    # Math.round rounds halves up, towards +Infinity
+    return f"{math.floor(math.floor(y0 * 100 + 0.5) / 10)}.png"
+
+
+def test_crop_name_in_tenths_of_a_point():
+    assert crop_name({"y0": 104.68}) == "1046.png"
+    assert crop_name({"y0": 0.0}) == "0.png"
+
+
+def test_crop_name_rounds_halves_up_like_the_viewer():
+    # 104.625 pt is exactly 10462.5 hundredths; round() would give 10462
+    assert crop_name({"y0": 104.625}) == js_crop_name(104.625) == "1046.png"
+    assert crop_name({"y0": 0.095}) == js_crop_name(0.095)
+
+
+def test_crop_name_matches_the_viewer_on_every_half():
+    for half in range(1, 20000, 2):
+        y0 = half / 200
+        assert crop_name({"y0": y0}) == js_crop_name(y0), y0
@@ -0,0 +1,125 @@
+import gzip
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+POLL_INTERVAL = 0.05
+
+
+def exam(course, section, room):
+    return {"Course": course, "Section": section, "Final Date": "2025-12-14", "Start Time": "09:00",
+            "End Time": "11:00", "Room.": room, "Page Number": 1}
+
+
+# Enough rows that /courses and /exams bodies pass the gzip threshold
+EXAMS = [exam(f"CSE{number}", str(section), "07A-04C") for number in range(100, 130) for section in range(1, 4)]
+
+
+def write_json(path, payload):
+    # Written to a temporary name and renamed, as the converters do
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(f"{path}.tmp", path)
+
+
+@pytest.fixture
+def server(tmp_path):
+    """(data file path, port) of a server started on an ephemeral port"""
+    data_path = tmp_path / 'exam_data.json'
+    write_json(data_path, {"metadata": {"source": "examData.pdf"}, "exams": EXAMS})
+
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'schedule_server.py'), str(data_path),
+                                '--port', '0', '--poll-interval', str(POLL_INTERVAL)],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        # The log line announcing the address carries the port the OS picked
+        for line in process.stdout:
+            match = re.search(r'http://[\d.]+:(\d+)', line)
+            if match:
+                break
+        else:
+            pytest.fail("the server exited before listening")
+        yield data_path, int(match.group(1))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def get(port, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def wait_for_new_etag(port, path, etag, timeout=5):
+    """The ETag of `path` once it differs from `etag`"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, headers, _ = get(port, path)
+        if headers['ETag'] != etag:
+            return headers['ETag']
+        time.sleep(POLL_INTERVAL)
+    pytest.fail(f"{path} kept ETag {etag} after the change")
+
+
+def test_if_none_match_gets_304(server):
+    _, port = server
+    status, headers, body = get(port, '/courses')
+    assert status == 200 and json.loads(body)["courses"][0] == "CSE100"
+    assert re.fullmatch(r'"[0-9a-f]{32}"', headers['ETag'])
+
+    status, headers_304, body = get(port, '/courses', {'If-None-Match': headers['ETag']})
+    assert status == 304 and body == b''
+    assert headers_304['ETag'] == headers['ETag']
+
+    assert get(port, '/courses', {'If-None-Match': '"something-else"'})[0] == 200
+
+
+def test_accept_encoding_gzip_gets_a_gzip_body(server):
+    _, port = server
+    _, _, plain = get(port, '/exams?course=CSE120')
+    status, headers, body = get(port, '/exams?course=CSE120', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'].endswith('-gzip"')
+    assert gzip.decompress(body) == plain
+
+    # The gzip representation's ETag revalidates as well
+    assert get(port, '/exams?course=CSE120', {'Accept-Encoding': 'gzip', 'If-None-Match': headers['ETag']})[0] == 304
+    assert 'Content-Encoding' not in get(port, '/exams?course=CSE120', {'Accept-Encoding': 'gzip;q=0'})[1]
+
+
+def test_etag_changes_when_the_data_file_is_rewritten(server):
+    data_path, port = server
+    _, headers, _ = get(port, '/exams?course=CSE100&section=1')
+
+    write_json(data_path, {"metadata": {"source": "examData.pdf"},
+                           "exams": [exam("CSE100", "1", "10C-01C"), *EXAMS[1:]]})
+    wait_for_new_etag(port, '/exams?course=CSE100&section=1', headers['ETag'])
+    assert json.loads(get(port, '/exams?course=CSE100&section=1')[2])["exams"][0]["Room."] == "10C-01C"
+
+
+def test_etag_changes_when_the_title_sidecar_is_rewritten(server):
+    data_path, port = server
+    _, headers, _ = get(port, '/status')
+
+    title_path = data_path.with_name('exam_data.title.json')
+    write_json(title_path, {"exam_name": "Final Exam", "semester": "Fall-2025", "title": "Final Exam Fall-2025"})
+    etag = wait_for_new_etag(port, '/status', headers['ETag'])
+    schedule = json.loads(get(port, '/status')[2])["schedule"]
+    assert schedule["metadata"]["semester"] == "Fall-2025" and schedule["semester_key"] == "fall2025"
+
+    write_json(title_path, {"exam_name": "Final Exam", "semester": "Spring-2026", "title": "Final Exam Spring-2026"})
+    wait_for_new_etag(port, '/status', etag)
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import schedule_slots
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The same rows and expected clashes are checked against js/data.js below
+CASES_PATH = os.path.join(ROOT, 'tests', 'fixtures', 'clash_cases.json')
+
+with open(CASES_PATH, 'r', encoding='utf-8') as f:
+    FIXTURE = json.load(f)
+CASES = FIXTURE["cases"]
+
+
+@pytest.fixture(scope='module')
+def slots_index():
+    data = {"metadata": {}, "exams": FIXTURE["exams"]}
+    raw = json.dumps(data).encode('utf-8')
+    return schedule_slots.build_slots(data, raw, 'exam_data.json')
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case["name"] for case in CASES])
+def test_find_clashes(slots_index, case):
+    assert schedule_slots.find_clashes(slots_index, case["selection"]) == case["clashes"]
+
+
+def test_overlapping_slots_are_precomputed(slots_index):
+    slots = [(slot["date"], slot["start"], slot["end"]) for slot in slots_index["slots"]]
+    morning = slots.index(("2025-12-14", "09:00", "11:00"))
+    late_morning = slots.index(("2025-12-14", "10:30", "12:30"))
+    noon = slots.index(("2025-12-14", "11:00", "13:00"))
+    assert slots_index["clashes"][str(morning)] == [late_morning]
+    assert sorted(slots_index["clashes"][str(late_morning)]) == sorted([morning, noon])
+
+
+# Runs js/data.js's findClashes on the fixture, with the slot index and with rows only
+JS_CHECK = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [dataJs, casesPath, slotsJson] = process.argv.slice(1);
+const fixture = JSON.parse(fs.readFileSync(casesPath, 'utf8'));
+const context = vm.createContext({
+    console, window: {},
+    utils: { formatDateFromJSON: value => value, convertTimeFromJSON: (start, end) => `${start}-${end}` },
+    fetch: async () => ({ ok: true, json: async () => JSON.parse(slotsJson) })
+});
+vm.runInContext(fs.readFileSync(dataJs, 'utf8'), context);
+(async () => {
+    const results = {};
+    for (const [mode, setup] of [
+        ['index', `indexExams(${JSON.stringify(fixture.exams)}, null); slotDataHash = ${JSON.stringify(JSON.parse(slotsJson).data_hash)}; slotIndexLoad = null;`],
+        ['rows', `indexExams(${JSON.stringify(fixture.exams)}, null); slotDataHash = null; slotIndexLoad = null;`]
+    ]) {
+        vm.runInContext(setup, context);
+        results[mode] = [];
+        for (const testCase of fixture.cases) {
+            context.selection = testCase.selection;
+            results[mode].push(await vm.runInContext('findClashes(selection)', context));
+        }
+    }
+    process.stdout.write(JSON.stringify(results));
+})();
+"""
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_site_find_clashes_agrees(slots_index):
+    result = subprocess.run(['node', '-e', JS_CHECK, os.path.join(ROOT, 'js', 'data.js'), CASES_PATH,
+                             json.dumps(slots_index)], capture_output=True, text=True, check=True)
+    results = json.loads(result.stdout)
+    expected = [case["clashes"] for case in CASES]
+    assert results["index"] == expected
+    assert results["rows"] == expected
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ndjson_stream
+import schedule_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+METADATA = {"source": "examData.pdf", "total_entries": 2}
+EXAMS = [
+    {"Course": "CSE220", "Section": "3", "Final Date": "2025-12-14", "Start Time": "09:00", "End Time": "11:00",
+     "Room.": "07A-04C", "Dept.": "CSE", "Page Number": 1,
+     "BoundingBox": {"x0": 10.5, "y0": 20.25, "x1": 300.0, "y1": 32.75}},
+    {"Course": "MAT120", "Section": "1", "Final Date": "2025-12-15", "Start Time": "14:00", "End Time": "16:00",
+     "Room.": "09B-11L", "Dept.": "MNS", "Page Number": 2},
+]
+
+
+def write_data(path, exams, metadata=METADATA):
+    """Write a data file the way the converters do"""
+    with open(path, 'w', encoding='utf-8') as f:
+        ndjson_stream.write_json(f, metadata, exams)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    with schedule_store.ScheduleStore(str(tmp_path / 'store.sqlite')) as store:
+        yield store
+
+
+def test_export_is_byte_identical_to_the_import(tmp_path, store):
+    data_path = write_data(tmp_path / 'exam_data.json', EXAMS)
+    assert store.import_file(str(data_path), 'Fall-2025') == ('Fall-2025', 'final')
+
+    export_path = tmp_path / 'exported.json'
+    assert store.export('Fall-2025', 'final', str(export_path)) == len(EXAMS)
+    assert export_path.read_bytes() == data_path.read_bytes()
+
+
+def test_bundled_schedule_round_trips(tmp_path, store):
+    data_path = os.path.join(ROOT, 'exam_data.json')
+    store.import_file(data_path, 'Summer-2026', 'final')
+    store.export('Summer-2026', 'final', str(tmp_path / 'exported.json'))
+    with open(data_path, 'rb') as f:
+        assert (tmp_path / 'exported.json').read_bytes() == f.read()
+
+
+def test_same_rows_are_imported_again(tmp_path, store):
+    data_path = str(write_data(tmp_path / 'exam_data.json', EXAMS))
+    store.import_file(data_path, 'Fall-2025')
+    assert store.import_file(data_path, 'Fall-2025') == ('Fall-2025', 'final')
+    assert len(store.schedules()) == 1
+
+
+def test_different_rows_are_refused_without_replace(tmp_path, store):
+    store.import_file(str(write_data(tmp_path / 'old.json', EXAMS)), 'Fall-2025')
+    changed = [dict(EXAMS[0], **{"Room.": "10C-01C"}), EXAMS[1]]
+    new_path = str(write_data(tmp_path / 'new.json', changed))
+
+    with pytest.raises(schedule_store.StoreConflict, match='Fall-2025 final'):
+        store.import_file(new_path, 'Fall-2025')
+    assert [exam["Room."] for _, _, exam in store.find('CSE220')] == ["07A-04C"]
+
+    store.import_file(new_path, 'Fall-2025', replace=True)
+    assert [exam["Room."] for _, _, exam in store.find('CSE220')] == ["10C-01C"]
+
+
+def test_refused_import_exits_non_zero(tmp_path):
+    store_path = str(tmp_path / 'store.sqlite')
+    changed = [dict(EXAMS[0], **{"Room.": "10C-01C"}), EXAMS[1]]
+    command = [sys.executable, os.path.join(ROOT, 'schedule_store.py'), '--store', store_path, 'import']
+
+    old_path = str(write_data(tmp_path / 'old.json', EXAMS))
+    new_path = str(write_data(tmp_path / 'new.json', changed))
+    assert subprocess.run([*command, old_path, '--semester', 'Fall-2025'], capture_output=True).returncode == 0
+    refused = subprocess.run([*command, new_path, '--semester', 'Fall-2025'], capture_output=True, text=True)
+    assert refused.returncode == 1
+    assert '--replace' in refused.stdout + refused.stderr
+    assert subprocess.run([*command, new_path, '--semester', 'Fall-2025', '--replace'],
+                          capture_output=True).returncode == 0
@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+import schedule_engine
+import text_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_PATH = os.path.join(ROOT, 'examData.pdf')
+
+pytestmark = pytest.mark.skipif(not os.path.exists(PDF_PATH), reason='examData.pdf is not in the checkout')
+
+
+def test_every_text_page_matches_table_extraction():
+    mismatched, fallback, pages, _ = text_rows.check_pdf(PDF_PATH)
+    assert mismatched == []
+    # Only irregular pages fall back to table extraction
+    assert pages > 0 and len(fallback) < pages
+
+
+@pytest.mark.parametrize('profile', ['final', 'mid'])
+def test_text_rows_convert_matches_table_extraction(tmp_path, profile):
+    outputs = {}
+    for use_text in (False, True):
+        json_path = tmp_path / f'exam_data.{use_text}.json'
+        schedule_engine.convert(PDF_PATH, {profile: str(json_path)}, use_cache=False, use_text=use_text)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            outputs[use_text] = json.load(f)["exams"]
+
+    assert outputs[True]
+    assert len(outputs[True]) == len(outputs[False])
+    for text_row, table_row in zip(outputs[True], outputs[False]):
+        assert text_row == table_row
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+text_rows.py
+
+Read a schedule page's rows straight from its text layer, skipping
+pdfplumber's table detection and cell extraction.
+
+One pass over the page's words gives both the page's text lines (the same
+lines extract_text() gives, for Line Number) and the table cells: the
+page's ruling lines mark the column and row positions, every word inside
+the grid goes to the cell it sits in, and the row and table bounding boxes
+are built from the same ruling lines as table extraction builds them.
+
+Every row below the header must match the row grammar, a regular
+expression compiled from the header with one pattern per column (serial
+number, course code, section, date, times, room, department). When a row
+does not match, a row holds more than one line of text, a word crosses a
+column line, or the ruling is not one plain grid, parse_page() returns
+None and the caller extracts the page's tables as usual. Either way the
+page model is the same.
+
+Usage:
+    python text_rows.py examData.pdf
+    python text_rows.py examData.pdf examData2.pdf.bak --verbose
+
+Run on its own, it checks every page of the given PDFs against table
+extraction, prints the time each path took and exits with status 1 if any
+page model differs.
+"""
+import argparse
+import functools
+import logging
+import re
+import sys
+import time
+from bisect import bisect_right
+from operator import itemgetter
+
+import pdfplumber
+from pdfplumber.table import TableSettings
+from pdfplumber.utils import DEFAULT_Y_TOLERANCE, cluster_objects
+
+import run_stats
+import table_template
+
+log = logging.getLogger(__name__)
+
+# Cell patterns by header keyword, checked in this order like normalize_headers() does
+COLUMN_PATTERNS = (
+    ("course", r"[A-Z]{2,5}\d{3}[A-Z]?"),
+    ("sec", r"[0-9A-Za-z][0-9A-Za-z()\- ]*"),
+    ("date", r"\d{1,2}-[A-Z][a-z]{2}-\d{2}"),
+    ("start", r"\d{1,2}:\d{2} [AP]M"),
+    ("end", r"\d{1,2}:\d{2} [AP]M"),
+    ("room", r"[0-9A-Z]+-[0-9A-Z]+"),
+    ("dept", r"[A-Za-z]+"),
+    ("sl", r"\d+"),
+)
+# Columns the grammar must know before a page is read as text rows
+REQUIRED_COLUMNS = ("course", "sec", "date")
+# Any other column: one line of text, or nothing
+OTHER_COLUMN = r"[^\t\n]*"
+
+
+@functools.lru_cache(maxsize=16)
+def row_grammar(header):
+    """Compiled pattern for a tab-joined data row under the `header` cells, or None if it lacks a needed column"""
+    patterns = []
+    found = set()
+    for cell in header:
+        text = (cell or "").lower()
+        keyword, pattern = next(((keyword, pattern) for keyword, pattern in COLUMN_PATTERNS if keyword in text),
+                                (None, OTHER_COLUMN))
+        found.add(keyword)
+        patterns.append(pattern)
+    if not found.issuperset(REQUIRED_COLUMNS):
+        return None
+    return re.compile("\t".join(f"(?:{pattern})" for pattern in patterns))
+
+
+def text_lines(page):
+    """The page's words grouped into lines, in the order extract_text() writes them"""
+    words = page.extract_words()
+    return cluster_objects(words, itemgetter("top"), DEFAULT_Y_TOLERANCE, preserve_order=True)
+
+
+def parse_page(page, page_num):
+    """Parse a page into its page model from the text layer, or return None if table extraction is needed"""
+    edges = table_template.page_edges(page, TableSettings.resolve(None))
+    columns = sorted({edge["x0"] for edge in edges if edge["orientation"] == "v"})
+    found_tables = table_template.find_tables(page, {"columns": columns}, edges) if len(columns) > 1 else None
+    if found_tables is None:
+        log.debug("  Page %s: ruling is not a single grid", page_num)
+        return None
+
+    table = found_tables[0]
+    row_boxes = [row.bbox for row in table.rows]
+    row_tops = [box[1] for box in row_boxes]
+    left, top, right, bottom = table.bbox
+
+    lines = text_lines(page)
+    cells = [[[] for _ in columns[1:]] for _ in row_boxes]
+    row_lines = [None] * len(row_boxes)
+    for line_idx, line in enumerate(lines):
+        for word in line:
+            # Table extraction places each character by its midpoint
+            v_mid = (word["top"] + word["bottom"]) / 2
+            if word["x1"] <= left or word["x0"] >= right or not top <= v_mid < bottom:
+                continue
+
+            row_idx = bisect_right(row_tops, v_mid) - 1
+            col_idx = bisect_right(columns, (word["x0"] + word["x1"]) / 2) - 1
+            if not 0 <= col_idx < len(columns) - 1 or word["x0"] < columns[col_idx] or word["x1"] > columns[col_idx + 1]:
+                log.debug("  Page %s: %r crosses a column line", page_num, word["text"])
+                return None
+            if row_lines[row_idx] not in (None, line_idx):
+                log.debug("  Page %s: row %s holds more than one line", page_num, row_idx)
+                return None
+            row_lines[row_idx] = line_idx
+            cells[row_idx][col_idx].append(word["text"])
+
+    rows = [[" ".join(words) for words in row] for row in cells]
+    grammar = row_grammar(tuple(rows[0]))
+    if grammar is None:
+        log.debug("  Page %s: header %s has no row grammar", page_num, rows[0])
+        return None
+    for row in rows[1:]:
+        # Empty rows read the same either way; the engine skips them
+        if any(row) and not grammar.fullmatch("\t".join(row)):
+            log.debug("  Page %s: row %s does not match the row grammar", page_num, row)
+            return None
+
+    return {
+        "page": page_num,
+        "lines": [" ".join(word["text"] for word in line) for line in lines],
+        "tables": [{
+            "bbox": list(table.bbox),
+            "rows": [{"cells": row, "bbox": list(box)} for row, box in zip(rows, row_boxes)]
+        }]
+    }
+
+
+def check_pdf(pdf_path):
+    """Compare the text path with table extraction on every page; returns (mismatched, fallback, pages, timings)"""
+    # The engine imports this module, so it is only imported where the check needs it
+    import schedule_engine
+
+    mismatched, fallback = [], []
+    timings = {"text": 0.0, "tables": 0.0}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            # Parsed once up front so neither path is billed for it
+            page.objects
+
+            start = time.perf_counter()
+            text_model = parse_page(page, page_num)
+            timings["text"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            table_model = schedule_engine.parse_page(page, page_num)
+            timings["tables"] += time.perf_counter() - start
+
+            if text_model is None:
+                fallback.append(page_num)
+            elif text_model != table_model:
+                mismatched.append(page_num)
+            page.close()
+        pages = len(pdf.pages)
+    return mismatched, fallback, pages, timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the text-row path against table extraction on every page')
+    parser.add_argument('pdf_paths', nargs='+', metavar='pdf_path', help='Schedule PDFs to check (e.g., examData.pdf)')
+    run_stats.add_logging_arguments(parser)
+    args = parser.parse_args()
+    run_stats.configure_logging(args.quiet, args.verbose)
+
+    failed = False
+    for pdf_path in args.pdf_paths:
+        mismatched, fallback, pages, timings = check_pdf(pdf_path)
+        failed = failed or bool(mismatched)
+        print(f"{pdf_path}: {pages - len(fallback) - len(mismatched)} of {pages} pages read as text rows, "
+              f"{len(fallback)} fall back to table extraction, {len(mismatched)} differ"
+              + (f" (pages {', '.join(map(str, mismatched))})" if mismatched else ""))
+        print(f"  text rows {timings['text'] / pages * 1000:.1f} ms/page, "
+              f"table extraction {timings['tables'] / pages * 1000:.1f} ms/page (page parsing excluded)")
+    sys.exit(1 if failed else 0)